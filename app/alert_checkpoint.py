@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Persisted scan checkpoints for alert logs.
+
+A checkpoint records how far an alert log was processed (byte offset of the last
+complete line), the timestamp governing the lines after it, and the per-code
+occurrence runs collected so far. A later run on the same (grown) log resumes at
+the offset instead of re-reading the file.
+
+Checkpoints are found by the file name plus the SHA-1 of the first HEAD_BYTES of
+the log and a caller-given scope (the scan settings), so the same log inside next
+week's bundle (another path, another inode) still matches, and runs with other
+settings keep their own checkpoint instead of overwriting each other's. A checkpoint is only used when
+  - the file is at least as long as the stored offset (not truncated),
+  - the bytes just before the offset hash to the stored value (same content),
+  - the file at the stored path was not replaced (same inode there),
+  - the stored window start (horizon) covers the requested one and the local
+    UTC offset (used for naive timestamps) is unchanged.
+Anything else means rotation/truncation/new settings and the caller rescans fully.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from awr_cache import atomic_write
+
+DEFAULT_CHECKPOINT_DIR = Path.home() / ".cache" / "pm_helper" / "alert"
+DEFAULT_MAX_ENTRIES = 512
+HEAD_BYTES = 4096
+TAIL_BYTES = 4096
+VERSION = 1
+
+
+def _sha1_range(fp, start: int, length: int) -> str:
+    fp.seek(start)
+    return hashlib.sha1(fp.read(length)).hexdigest()
+
+
+class AlertCheckpoints:
+    def __init__(self, root: Path = DEFAULT_CHECKPOINT_DIR, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.root = Path(root)
+        self.max_entries = max_entries
+
+    def _key(self, log_path: Path, fp, size: int, scope: str) -> str:
+        h = hashlib.sha1(f"{log_path.name}|{scope}".encode("utf-8"))
+        fp.seek(0)
+        h.update(fp.read(min(size, HEAD_BYTES)))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / f"{key}.json.gz"
+
+    def load(self, log_path: Path, horizon: float, tz: str, scope: str = "") -> Tuple[Optional[Dict[str, Any]], str]:
+        """(checkpoint state, reason) - state is None when a full scan is needed; reason says why."""
+        try:
+            st = log_path.stat()
+            with log_path.open("rb") as fp:
+                entry = self._entry_path(self._key(log_path, fp, st.st_size, scope))
+                try:
+                    with gzip.open(entry, "rt", encoding="utf-8") as f:
+                        state = json.load(f)
+                except FileNotFoundError:
+                    return None, "no checkpoint"
+                if state.get("version") != VERSION:
+                    return None, "checkpoint format changed"
+                offset = int(state["offset"])
+                if st.st_size < offset:
+                    return None, "log truncated"
+                if state.get("path") == str(log_path.resolve()) and state.get("inode") != st.st_ino:
+                    return None, "log rotated"
+                tail_len = min(offset, TAIL_BYTES)
+                if _sha1_range(fp, offset - tail_len, tail_len) != state.get("tail_sha1"):
+                    return None, "log content changed"
+        except Exception as e:
+            return None, f"checkpoint unreadable ({e})"
+        if state.get("tz") != tz:
+            return None, "local UTC offset changed"
+        if horizon < state.get("horizon", float("inf")):
+            return None, "window starts before the checkpoint horizon"
+        try: os.utime(entry)  # LRU: mark as recently used
+        except OSError: pass
+        return state, f"resuming at byte {offset:,} of {st.st_size:,}"
+
+    def save(self, log_path: Path, state: Dict[str, Any], scope: str = "") -> None:
+        """Store `state` (must hold "offset"); file identity fields are filled in here."""
+        try:
+            st = log_path.stat()
+            offset = int(state["offset"])
+            with log_path.open("rb") as fp:
+                key = self._key(log_path, fp, st.st_size, scope)
+                tail_len = min(offset, TAIL_BYTES)
+                tail_sha1 = _sha1_range(fp, offset - tail_len, tail_len)
+            state = dict(state, version=VERSION, path=str(log_path.resolve()), inode=st.st_ino, tail_sha1=tail_sha1)
+            payload = gzip.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+            atomic_write(self._entry_path(key), payload)
+        except Exception as e:
+            print(f"[debug] Failed to save alert checkpoint for {log_path}: {e}")
+
+    def flush(self) -> None:
+        """Drop the least recently used checkpoints beyond max_entries (call once per run)."""
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for p in self.root.glob("*.json.gz"):
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except OSError:
+                continue
+        for _, p in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try: p.unlink()
+            except OSError: pass
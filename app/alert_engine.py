@@ -0,0 +1,1392 @@
+#!/usr/bin/env python3
+"""
+Streaming alert log engine shared by mini_pm.run_alert_log, alert_log_check and
+alert_log_check_mapped.
+
+Scanning turns alert logs (text, rotated/gzip'd, ADR log.xml) into AlertRuns: per event
+key (ORA code, TNS code, "Log switch", ... as set by an EventMatcher pattern table), the
+occurrences in file order, compressed into runs. Runs are mergeable (several
+logs, parallel byte ranges) and persistable (alert_checkpoint). Reports are built by
+replaying runs into an aggregator:
+  FirstLastCount  code -> first/last occurrence, info of the first one, count
+  Window          passes on occurrences at/after an epoch only
+  Kinds           passes on the keys of some patterns only (e.g. ORA)
+  MappingJoin     adds cause/action from an ORA code mapping
+  DailyBuckets    per code and calendar day: count, first and last (-> AlertBuckets)
+summarize() chains them the way the alert reports use them; AlertBuckets answers other
+windows, weekly trends and sparklines by range sums, and is saved next to the report.
+The byte offsets of the occurrences are kept too and saved as an index sidecar, so
+show_occurrences() can print them from the log with context without another scan.
+
+Timestamps: lines in the 12c+ ISO or 11g ctime layout (others via strptime/fromisoformat);
+naive ones are local time. An ORA-nnnnn (or other pattern hit) anywhere in a line counts,
+under the latest timestamp line before it; occurrences before the first timestamp are not counted.
+"""
+
+import calendar
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# `since` for "no window": every timestamped occurrence counts
+NO_WINDOW = float("-inf")
+
+# ---------- timestamps ----------
+_TS_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S",
+    "%a %b %d %H:%M:%S %Y %z", "%a %b %d %H:%M:%S %Y",
+]
+def _parse_ts_slow(s: str) -> Optional[datetime]:
+    if s.endswith("Z"): s = s[:-1] + "+00:00"
+    for fmt in _TS_FORMATS:
+        try: return datetime.strptime(s, fmt)
+        except Exception: continue
+    try: return datetime.fromisoformat(s)
+    except Exception: return None
+
+# Fixed layouts of the two formats Oracle writes (12c+ ISO, 11g ctime-like). A line in one
+# of these layouts is sliced directly; anything else that could still be a timestamp goes
+# through _parse_ts_slow, so the result is always the same as the strptime chain above.
+_ISO_TS_RE = re.compile(r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.(\d{6}))?(?:([+-]\d\d):(\d\d))?\Z", re.A)
+_CTIME_TS_RE = re.compile(r"[A-Za-z]{3} ([A-Za-z]{3}) (\d\d) (\d\d):(\d\d):(\d\d) (\d{4})\Z", re.A)
+# strptime's %a/%b names for the current locale (case-insensitive, like strptime)
+_WEEKDAYS = {calendar.day_abbr[i].lower() for i in range(7)}
+_MONTHS = {calendar.month_abbr[i].lower(): i for i in range(1, 13)}
+# a line starting with 3 ASCII letters that are not a weekday can be rejected outright
+_REJECT_BY_WEEKDAY = all(len(a) == 3 and a.isascii() and a.isalpha() for a in _WEEKDAYS)
+_NOT_TS = object()
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_day_cache: Dict[Tuple[int, int, int], int] = {}
+_tz_cache: Dict[Tuple[str, str], int] = {}
+
+def _ts_fields(s: str):
+    """
+    Stripped line -> (days since 1970-01-01, y, mon, d, H, M, S, us, utc offset s or None),
+    _NOT_TS when no timestamp format can match (cheap prefix check), None when unsure.
+    """
+    c = s[:1]
+    if "0" <= c <= "9":
+        if s[-1] == "Z": s = s[:-1] + "+00:00"
+        m = _ISO_TS_RE.match(s)
+        if not m: return None
+        y, mo, d, hh, mi, ss, frac, tzh, tzm = m.groups()
+        us = int(frac) if frac else 0
+        if tzh is None:
+            off = None
+        else:
+            off = _tz_cache.get((tzh, tzm))
+            if off is None:
+                if int(tzm) > 59 or abs(int(tzh)) > 23: return None
+                off = _tz_cache[(tzh, tzm)] = (int(tzh) * 60 + (int(tzm) if tzh[0] == "+" else -int(tzm))) * 60
+    elif "A" <= c <= "z" and c.isalpha():
+        head = s[:3]
+        if _REJECT_BY_WEEKDAY and head.isascii() and head.lower() not in _WEEKDAYS: return _NOT_TS
+        m = _CTIME_TS_RE.match(s)
+        if not m or head.lower() not in _WEEKDAYS: return None
+        mon, d, hh, mi, ss, y = m.groups()
+        mo = _MONTHS.get(mon.lower())
+        if mo is None: return None
+        us, off = 0, None
+    elif c.isascii():
+        return _NOT_TS  # empty, or punctuation: neither strptime format nor fromisoformat starts so
+    else:
+        return None
+    y, mo, d, hh, mi, ss = int(y), int(mo), int(d), int(hh), int(mi), int(ss)
+    if hh > 23 or mi > 59 or ss > 59: return None
+    days = _day_cache.get((y, mo, d))
+    if days is None:
+        try: days = _day_cache[(y, mo, d)] = date(y, mo, d).toordinal() - _EPOCH_ORDINAL
+        except ValueError: return None
+    return days, y, mo, d, hh, mi, ss, us, off
+
+def parse_ts(line: str) -> Optional[datetime]:
+    s = line.strip()
+    f = _ts_fields(s)
+    if f is _NOT_TS: return None
+    if f is None: return _parse_ts_slow(s)
+    _, y, mo, d, hh, mi, ss, us, off = f
+    return datetime(y, mo, d, hh, mi, ss, us, tzinfo=None if off is None else timezone(timedelta(seconds=off)))
+
+def ts_epoch(line: str, local_offset: int) -> Optional[float]:
+    """
+    Epoch seconds of a timestamp line, naive ones read in `local_offset` (seconds east of UTC):
+    the same value as parse_ts() + replace/astimezone(local tz) + .timestamp(), without datetimes.
+    """
+    s = line.strip()
+    f = _ts_fields(s)
+    if f is _NOT_TS: return None
+    if f is None:
+        ts = _parse_ts_slow(s)
+        if ts is None: return None
+        if ts.tzinfo is None: ts = ts.replace(tzinfo=timezone(timedelta(seconds=local_offset)))
+        return ts.timestamp()
+    days, _, _, _, hh, mi, ss, us, off = f
+    secs = days * 86400 + hh * 3600 + mi * 60 + ss - (local_offset if off is None else off)
+    return (secs * 1000000 + us) / 1000000  # int / int, rounded exactly like timedelta.total_seconds()
+
+def ts_day(ts_str: Optional[str], epoch: float) -> int:
+    """
+    Calendar day (days since 1970-01-01) an occurrence is printed on: the date as written in
+    its timestamp, in the log's own offset, so days do not shift by an hour across a DST change.
+    The local date of `epoch` when the timestamp cannot be read.
+    """
+    if ts_str:
+        s = ts_str.strip()
+        f = _ts_fields(s)
+        if f is not None and f is not _NOT_TS:
+            return f[0]
+        ts = _parse_ts_slow(s) if f is None else None
+        if ts is not None:
+            return ts.toordinal() - _EPOCH_ORDINAL
+    return local_day(epoch)
+
+def local_day(epoch: float) -> int:
+    """Local calendar day (days since 1970-01-01) of `epoch`, with the UTC offset in force then."""
+    return date.fromtimestamp(epoch).toordinal() - _EPOCH_ORDINAL
+
+# ---------- event patterns ----------
+# (name, trigger literals, regex). A line holding a trigger is searched with the regex; a hit
+# counts under its "key" group (e.g. the ORA code) or else under `name`, with the "info" group
+# as info. Triggers of a case-insensitive regex ((?i) / re.I) match in any case.
+# The ORA entry is always first: the alert report is built from it.
+ORA_PATTERN = ("ORA", ("ORA-",), r"\b(?P<key>ORA-\d{5})\b[: ]?(?P<info>.*)")
+DEFAULT_EVENT_PATTERNS = [
+    ("TNS", ("TNS-",), r"\b(?P<key>TNS-\d{5})\b[: ]?(?P<info>.*)"),
+    ("Checkpoint not complete", ("Checkpoint not complete",), r"Checkpoint not complete"),
+    ("Log switch", ("advanced to log sequence",), r"\bThread \d+ advanced to log sequence \d+(?P<info>.*)"),
+    ("Deadlock", ("deadlock",), r"(?i)\bdeadlock\b(?P<info>.*)"),
+]
+
+class EventMatcher:
+    """
+    A pattern table compiled for one pass over a log. Python's re has no multi-literal fast
+    path (an alternation of the triggers scans ~10x slower than one literal) and there is no
+    Aho-Corasick in the stdlib, so every trigger is found by its own C-speed literal search
+    and the hit offsets are merged in file order; only hit lines are decoded and classified.
+    Picklable, so it travels to scan worker processes.
+    """
+    def __init__(self, patterns=DEFAULT_EVENT_PATTERNS):
+        self.patterns = [ORA_PATTERN] + [tuple(p) for p in patterns if p[0] != ORA_PATTERN[0]]
+        self.entries = []  # (name, triggers, compiled regex, triggers match in any case)
+        for name, triggers, regex in self.patterns:
+            rx = re.compile(regex)
+            fold = bool(rx.flags & re.I)
+            self.entries.append((name, tuple(t.lower() for t in triggers) if fold else tuple(triggers), rx, fold))
+        self.triggers = sorted({t for _, triggers, _, fold in self.entries if not fold for t in triggers})
+        self.folded_triggers = sorted({t for _, triggers, _, fold in self.entries if fold for t in triggers})
+        self.byte_triggers = ([re.compile(re.escape(t.encode("utf-8"))) for t in self.triggers] +
+                              [re.compile(re.escape(t.encode("utf-8")), re.I) for t in self.folded_triggers])
+        self.signature = hashlib.sha1(repr(self.patterns).encode("utf-8")).hexdigest()
+        self._kinds: Dict[str, str] = {}
+
+    def hits(self, mm, start: int, end: int):
+        """Offsets in [start, end) of every trigger occurrence, ascending."""
+        if len(self.byte_triggers) == 1:
+            return (m.start() for m in self.byte_triggers[0].finditer(mm, start, end))
+        return heapq.merge(*((m.start() for m in r.finditer(mm, start, end)) for r in self.byte_triggers))
+
+    def classify(self, line: str) -> List[Tuple[str, str]]:
+        """(key, info) for every pattern the line matches (first match per pattern)."""
+        out = []
+        low = None
+        for name, triggers, regex, fold in self.entries:
+            if fold and low is None:
+                low = line.lower()
+            text = low if fold else line
+            for t in triggers:
+                if t in text: break
+            else:
+                continue
+            m = regex.search(line)
+            if m:
+                groups = m.groupdict()
+                out.append((groups.get("key") or name, (groups.get("info") or "").strip()))
+        return out
+
+    def kind_of(self, key: str) -> Optional[str]:
+        """Pattern name a key was counted under (None if no pattern produces it)."""
+        kind = self._kinds.get(key)
+        if kind is None:
+            for name, _, regex, _ in self.entries:
+                m = regex.search(key) if "key" in regex.groupindex else None
+                if key == name or (m and m.group("key") == key):
+                    kind = self._kinds[key] = name
+                    break
+        return kind
+
+    def __getstate__(self):
+        return {"patterns": self.patterns[1:]}
+
+    def __setstate__(self, state):
+        self.__init__(state["patterns"])
+
+DEFAULT_MATCHER = EventMatcher()
+
+def load_event_patterns(path: Path) -> List[tuple]:
+    """
+    Extra event patterns from a CSV with columns name,triggers,regex (triggers: literals
+    separated by "|"), in addition to ORA-.
+    """
+    import csv
+    patterns = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("name") or "").strip()
+            regex = (row.get("regex") or "").strip()
+            triggers = tuple(t for t in (row.get("triggers") or "").split("|") if t)
+            if not name or not regex or not triggers:
+                raise ValueError(f"event pattern needs name, triggers and regex: {row}")
+            re.compile(regex)
+            patterns.append((name, triggers, regex))
+    return patterns
+
+# ---------- message templates ----------
+# Variable parts of a message, masked in this order (quoted names first: they may hold digits)
+_TEMPLATE_SUBS = [
+    (re.compile(r'"[^"]*"(?:\."[^"]*")*'), "<OBJ>"),
+    (re.compile(r"'[^']*'"), "<OBJ>"),
+    (re.compile(r"(?:[A-Za-z]:)?(?:[/\\][\w.$#@+-]*[\w$#@+-]){2,}[/\\]?"), "<PATH>"),
+    (re.compile(r"\b0[xX][0-9A-Fa-f]+\b"), "<HEX>"),
+    (re.compile(r"(?<![A-Z]-)\b\d+(?:\.\d+)?\b"), "<N>"),
+]
+# Codes whose first [argument] names the problem (ORA-600 [4137] vs [kdsgrp1]): kept as is
+_TEMPLATE_KEEP_FIRST_ARG = {"ORA-00600", "ORA-07445"}
+_FIRST_ARG_RE = re.compile(r"^([^\[]*\[[^\]]*\])(.*)$")
+TEMPLATE_TOP_K = 10
+
+def message_template(code: str, info: str) -> str:
+    """`info` with numbers, hex values, quoted object names and paths masked (<N>, <HEX>, <OBJ>, <PATH>)."""
+    keep = ""
+    if code in _TEMPLATE_KEEP_FIRST_ARG:
+        m = _FIRST_ARG_RE.match(info)
+        if m:
+            keep, info = m.group(1), m.group(2)
+    for regex, mask in _TEMPLATE_SUBS:
+        info = regex.sub(mask, info)
+    return keep + info
+
+class TopK:
+    """
+    Space-saving top-k counter (Metwally et al.): at most `k` items are tracked; a new item
+    replaces the least counted one and inherits its count as possible overcount (error), so
+    memory stays O(k) and every item with more than total/k occurrences is kept.
+    """
+    def __init__(self, k: int = TEMPLATE_TOP_K, items: Optional[Dict[str, List[int]]] = None):
+        self.k = k
+        self.items: Dict[str, List[int]] = items if items is not None else {}  # item -> [count, error]
+
+    def add(self, item: str, count: int = 1) -> None:
+        entry = self.items.get(item)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.items) < self.k:
+            self.items[item] = [count, 0]
+        else:
+            low = min(self.items, key=lambda i: self.items[i][0])
+            floor = self.items.pop(low)[0]
+            self.items[item] = [floor + count, floor]
+
+    def _floor(self) -> int:
+        return min(c for c, _ in self.items.values()) if len(self.items) >= self.k else 0
+
+    def merge(self, other: "TopK") -> None:
+        """Fold in a summary of other occurrences (an item missing on one side may have had up to its floor there)."""
+        f1, f2 = self._floor(), other._floor()
+        merged = {}
+        for item in self.items.keys() | other.items.keys():
+            c1, e1 = self.items.get(item, (f1, f1))
+            c2, e2 = other.items.get(item, (f2, f2))
+            merged[item] = [c1 + c2, e1 + e2]
+        self.items = dict(sorted(merged.items(), key=lambda kv: -kv[1][0])[:self.k])
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(item, count, error) by count, highest first; count - error is a guaranteed minimum."""
+        ranked = sorted(((i, c, e) for i, (c, e) in self.items.items()), key=lambda t: (-t[1], t[0]))
+        return ranked[:n] if n else ranked
+
+# ---------- scanning ----------
+
+class AlertRuns:
+    """
+    Event occurrences per key (ORA code, ...) as runs [epoch, ts_str, count, variant] in file order:
+    consecutive occurrences of a code under the same timestamp and message_template() share a run
+    (count). `variant` indexes variants[code], the distinct [template, info] of the code, where info
+    is the message of the first occurrence seen with that template: runs hold no message text, so
+    they grow with timestamps, not with message variety. That is enough to replay the first/last/count
+    rules for any window start (info is that of the variant), so runs can be persisted and extended.
+    Next to them, per code, the template of every occurrence is counted while scanning in a TopK
+    (`templates`, k entries) and the earliest occurrence is kept with its own message (`first`:
+    [epoch, ts_str, info], same rules as FirstLastCount); both always cover exactly the
+    occurrences in `runs`, and summarize() reports that message as the info.
+    Occurrences added with a position are also indexed in `offsets`: log path -> code ->
+    [epochs, byte offsets of the lines, byte offsets of their timestamp lines (-1: unknown)].
+    """
+    # Bumped when the meaning of runs changes (checkpointed runs of another format are rebuilt)
+    FORMAT = 4
+
+    def __init__(self, runs: Optional[Dict[str, List[list]]] = None,
+                 offsets: Optional[Dict[str, Dict[str, List[array]]]] = None,
+                 variants: Optional[Dict[str, List[list]]] = None,
+                 first: Optional[Dict[str, list]] = None):
+        self.runs: Dict[str, List[list]] = runs if runs is not None else {}
+        self.offsets: Dict[str, Dict[str, List[array]]] = offsets if offsets is not None else {}
+        self.variants: Dict[str, List[list]] = variants if variants is not None else {}
+        self.first: Dict[str, list] = first if first is not None else {}
+        self._variant_ids: Dict[str, Dict[str, int]] = {
+            code: {v[0]: i for i, v in enumerate(vs)} for code, vs in self.variants.items()}
+        self.templates: Dict[str, TopK] = {code: self._sketch(code) for code in self.runs}
+        self.stale_first: set = set()  # codes whose `first` info came from a variant after prune()
+
+    def _variant(self, code: str, template: str, info: str) -> int:
+        ids = self._variant_ids.get(code)
+        if ids is None:
+            ids = self._variant_ids[code] = {}
+            self.variants[code] = []
+        vid = ids.get(template)
+        if vid is None:
+            vid = ids[template] = len(self.variants[code])
+            self.variants[code].append([template, info])
+        return vid
+
+    def _sketch(self, code: str) -> TopK:
+        """TopK of the templates of the runs of `code` (rebuilt from runs, no message parsing)."""
+        sketch = TopK()
+        variants = self.variants[code]
+        for _, _, count, vid in self.runs[code]:
+            sketch.add(variants[vid][0], count)
+        return sketch
+
+    def add(self, code: str, epoch: float, ts_str: str, info: str, at: Optional[tuple] = None) -> None:
+        """`at`: (log path, line offset, timestamp line offset) of the occurrence, if known."""
+        template = message_template(code, info)
+        vid = self._variant(code, template, info)
+        runs = self.runs.get(code)
+        if runs is None:
+            self.runs[code] = [[epoch, ts_str, 1, vid]]
+        elif runs[-1][0] == epoch and runs[-1][3] == vid:
+            runs[-1][2] += 1  # a later occurrence at the same time never moves first/last/info
+        else:
+            runs.append([epoch, ts_str, 1, vid])
+        self._see_first(code, epoch, ts_str, info)
+        sketch = self.templates.get(code)
+        if sketch is None:
+            sketch = self.templates[code] = TopK()
+        sketch.add(template)
+        if at is not None:
+            codes = self.offsets.get(at[0])
+            if codes is None:
+                codes = self.offsets[at[0]] = {}
+            idx = codes.get(code)
+            if idx is None:
+                idx = codes[code] = [array("d"), array("q"), array("q")]
+            idx[0].append(epoch); idx[1].append(at[1]); idx[2].append(at[2])
+
+    def _see_first(self, code: str, epoch: float, ts_str: str, info: str) -> None:
+        first = self.first.get(code)
+        if first is None:
+            self.first[code] = [epoch, ts_str, info]
+        elif epoch < first[0]:
+            first[0] = epoch; first[1] = ts_str
+            if info: first[2] = info
+
+    def extend(self, later: "AlertRuns") -> None:
+        """
+        Append the runs of the part of the log that follows this one. Runs are kept in file
+        order, so this is exactly the aggregate of both parts read in sequence.
+        """
+        for code, more in later.runs.items():
+            remap = [self._variant(code, template, info) for template, info in later.variants[code]]
+            more = [[epoch, ts_str, count, remap[vid]] for epoch, ts_str, count, vid in more]
+            self._see_first(code, *later.first[code])
+            if code in self.templates:
+                self.templates[code].merge(later.templates[code])
+            else:
+                self.templates[code] = later.templates[code]
+            runs = self.runs.get(code)
+            if runs is None:
+                self.runs[code] = more; continue
+            if runs[-1][0] == more[0][0] and runs[-1][3] == more[0][3]:
+                runs[-1][2] += more[0][2]; more = more[1:]
+            runs.extend(more)
+        for path, more_codes in later.offsets.items():
+            codes = self.offsets.setdefault(path, {})
+            for code, more in more_codes.items():
+                idx = codes.get(code)
+                if idx is None:
+                    codes[code] = more; continue
+                for a, b in zip(idx, more):
+                    a.extend(b)
+
+    def prune(self, since: float) -> None:
+        """
+        Drop runs before `since` (they can no longer be inside any window we serve), with the
+        variants no run uses any more; the template counts of the codes concerned are rebuilt.
+        A code whose earliest occurrence goes gets the next one as `first`, listed in
+        `stale_first` until reread_first() has read its own message back from the log.
+        """
+        for code in list(self.runs):
+            runs = self.runs[code]
+            kept = [r for r in runs if r[0] >= since]
+            if len(kept) == len(runs):
+                continue
+            if not kept:
+                del self.runs[code], self.variants[code], self._variant_ids[code], self.templates[code], self.first[code]
+                continue
+            if self.first[code][0] < since:
+                # earliest remaining occurrence; its message is that of its template until
+                # reread_first() finds the line again
+                r = min(kept, key=lambda r: r[0])
+                self.first[code] = [r[0], r[1], self.variants[code][r[3]][1]]
+                self.stale_first.add(code)
+            used = sorted({r[3] for r in kept})
+            remap = {old: new for new, old in enumerate(used)}
+            self.variants[code] = [self.variants[code][old] for old in used]
+            self._variant_ids[code] = {v[0]: i for i, v in enumerate(self.variants[code])}
+            for r in kept:
+                r[3] = remap[r[3]]
+            self.runs[code] = kept
+            self.templates[code] = self._sketch(code)
+        for codes in self.offsets.values():
+            for code in list(codes):
+                epochs, pos, ts_pos = codes[code]
+                keep = [i for i, e in enumerate(epochs) if e >= since]
+                if not keep: del codes[code]
+                elif len(keep) < len(epochs):
+                    codes[code] = [array("d", (epochs[i] for i in keep)), array("q", (pos[i] for i in keep)),
+                                   array("q", (ts_pos[i] for i in keep))]
+
+    def offsets_state(self, path: str) -> Dict[str, List[list]]:
+        """The offsets of one log as plain lists (checkpoint state)."""
+        return {code: [a.tolist() for a in idx] for code, idx in self.offsets.get(path, {}).items()}
+
+    @staticmethod
+    def offsets_from_state(path: str, state: Dict[str, List[list]]) -> Dict[str, Dict[str, List[array]]]:
+        return {path: {code: [array("d", e), array("q", p), array("q", t)] for code, (e, p, t) in state.items()}}
+
+# ---------- aggregators ----------
+# An aggregator gets add(code, runs) once per code (runs in file order, see AlertRuns, with
+# the variant resolved to its info: (epoch, ts_str, count, info), iterated once) and builds
+# the report in result(); aggregate() drives it.
+
+class FirstLastCount:
+    """code -> {first, last, info, count} (+ first_e/last_e epochs), per-occurrence rules."""
+    def __init__(self):
+        self.agg: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, code: str, runs: Iterable[tuple]) -> None:
+        meta = self.agg.get(code)
+        for epoch, ts_str, count, info in runs:
+            if meta is None:
+                meta = self.agg[code] = {"first": ts_str, "first_e": epoch, "last": ts_str, "last_e": epoch,
+                                         "info": info, "count": count}
+                continue
+            meta["count"] += count
+            # Update first occurrence if current is earlier
+            if epoch < meta["first_e"]:
+                meta["first_e"] = epoch; meta["first"] = ts_str
+                if info: meta["info"] = info
+            # Update last occurrence if current is later
+            if epoch > meta["last_e"]:
+                meta["last_e"] = epoch; meta["last"] = ts_str
+
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        return self.agg
+
+class Window:
+    """Pass on only the occurrences at/after `since` (epoch) to `inner`."""
+    def __init__(self, since: float, inner):
+        self.since = since
+        self.inner = inner
+
+    def add(self, code: str, runs: Iterable[tuple]) -> None:
+        since = self.since
+        kept = [r for r in runs if r[0] >= since]
+        if kept:
+            self.inner.add(code, kept)
+
+    def result(self):
+        return self.inner.result()
+
+class Kinds:
+    """Pass on only the keys `matcher` counts under one of `kinds` (pattern names) to `inner`."""
+    def __init__(self, kinds, inner, matcher: Optional[EventMatcher] = None):
+        self.kinds = set(kinds)
+        self.inner = inner
+        self.matcher = matcher or DEFAULT_MATCHER
+
+    def add(self, code: str, runs: Iterable[tuple]) -> None:
+        if self.matcher.kind_of(code) in self.kinds:
+            self.inner.add(code, runs)
+
+    def result(self):
+        return self.inner.result()
+
+class MappingJoin:
+    """Add "cause"/"action" from `mapping` (code -> {cause, action}) to every code of `inner`'s result."""
+    def __init__(self, mapping: Dict[str, Dict[str, str]], inner):
+        self.mapping = mapping
+        self.inner = inner
+
+    def add(self, code: str, runs: Iterable[tuple]) -> None:
+        self.inner.add(code, runs)
+
+    def result(self):
+        agg = self.inner.result()
+        for code, meta in agg.items():
+            m = self.mapping.get(code, {})
+            meta["cause"] = m.get("cause", "")
+            meta["action"] = m.get("action", "")
+        return agg
+
+class DailyBuckets:
+    """
+    Per code and calendar day (as printed, see ts_day): count, first occurrence
+    [epoch, ts, info] and last [epoch, ts], same rules as FirstLastCount within a day.
+    result() is an AlertBuckets.
+    """
+    def __init__(self):
+        self.days: Dict[str, Dict[int, list]] = {}
+
+    def add(self, code: str, runs: Iterable[tuple]) -> None:
+        days = self.days.setdefault(code, {})
+        for epoch, ts_str, count, info in runs:
+            day = ts_day(ts_str, epoch)
+            b = days.get(day)
+            if b is None:
+                days[day] = [count, [epoch, ts_str, info], [epoch, ts_str]]
+                continue
+            b[0] += count
+            if epoch < b[1][0]:
+                b[1][0] = epoch; b[1][1] = ts_str
+                if info: b[1][2] = info
+            if epoch > b[2][0]:
+                b[2] = [epoch, ts_str]
+
+    def result(self) -> "AlertBuckets":
+        all_days = [d for days in self.days.values() for d in days]
+        first_day = min(all_days) if all_days else 0
+        ndays = max(all_days) - first_day + 1 if all_days else 0
+        codes = {}
+        for code, days in self.days.items():
+            counts = array("I", bytes(4 * ndays))
+            for d, b in days.items():
+                counts[d - first_day] = b[0]
+            codes[code] = {"counts": counts, "first": {d: b[1] for d, b in days.items()},
+                           "last": {d: b[2] for d, b in days.items()}}
+        return AlertBuckets(first_day, ndays, codes)
+
+class AlertBuckets:
+    """
+    Day-bucketed alert occurrences (see DailyBuckets): per code an array of daily counts from
+    `first_day` (days since 1970-01-01, dates as printed in the log) plus first/last per
+    non-empty day. Windows are whole days, so a window is a slice sum rather than a rescan.
+    """
+    VERSION = 2
+    SPARK = "▁▂▃▄▅▆▇█"
+
+    def __init__(self, first_day: int, ndays: int, codes: Dict[str, Dict[str, Any]]):
+        self.first_day = first_day
+        self.ndays = ndays
+        self.codes = codes
+
+    def day_of(self, epoch: float) -> int:
+        return local_day(epoch)
+
+    def today(self) -> int:
+        return date.today().toordinal() - _EPOCH_ORDINAL
+
+    def window(self, start_day: int, end_day: int) -> Dict[str, Dict[str, Any]]:
+        """
+        code -> {first, last, info, count} over days [start_day, end_day]. Same as summarize()
+        from the first day's start, except that info is the earliest occurrence's own when the
+        log is out of time order.
+        """
+        lo, hi = max(start_day - self.first_day, 0), min(end_day - self.first_day + 1, self.ndays)
+        agg: Dict[str, Dict[str, Any]] = {}
+        if lo >= hi:
+            return agg
+        for code, c in self.codes.items():
+            count = sum(c["counts"][lo:hi])
+            if not count:
+                continue
+            days = [d for d in c["first"] if lo <= d - self.first_day < hi]
+            first = c["first"][min(days, key=lambda d: c["first"][d][0])]
+            last = c["last"][max(days, key=lambda d: c["last"][d][0])]
+            agg[code] = {"first": first[1], "first_e": first[0], "last": last[1], "last_e": last[0],
+                         "info": first[2], "count": count}
+        return agg
+
+    def last_days(self, n: int) -> Dict[str, Dict[str, Any]]:
+        """window() over the last `n` local days, today included."""
+        today = self.today()
+        return self.window(today - n + 1, today)
+
+    def weekly(self, weeks: int, code: Optional[str] = None) -> List[int]:
+        """Occurrences per 7-day block for the last `weeks` weeks (oldest first), one code or all."""
+        today = self.today()
+        codes = [self.codes[code]] if code in self.codes else ([] if code else list(self.codes.values()))
+        out = []
+        for w in range(weeks - 1, -1, -1):
+            lo = max(today - 7 * w - 6 - self.first_day, 0)
+            hi = min(today - 7 * w + 1 - self.first_day, self.ndays)
+            out.append(sum(sum(c["counts"][lo:hi]) for c in codes) if lo < hi else 0)
+        return out
+
+    @classmethod
+    def sparkline(cls, values: List[int]) -> str:
+        """One block character per value: lowest for 0, the rest scaled to the maximum."""
+        top = max(values, default=0)
+        steps = len(cls.SPARK) - 1
+        return "".join(cls.SPARK[1 + (v - 1) * (steps - 1) // max(top - 1, 1)] if v > 0 else cls.SPARK[0] for v in values)
+
+    def save(self, path: Path) -> None:
+        data = {"version": self.VERSION, "first_day": self.first_day, "ndays": self.ndays,
+                "codes": {code: {"counts": c["counts"].tolist(),
+                                 "first": {str(d): v for d, v in c["first"].items()},
+                                 "last": {str(d): v for d, v in c["last"].items()}}
+                          for code, c in self.codes.items()}}
+        path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "AlertBuckets":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"unsupported alert bucket file version: {data.get('version')}")
+        codes = {code: {"counts": array("I", c["counts"]),
+                        "first": {int(d): v for d, v in c["first"].items()},
+                        "last": {int(d): v for d, v in c["last"].items()}}
+                 for code, c in data["codes"].items()}
+        return cls(data["first_day"], data["ndays"], codes)
+
+def aggregate(runs: AlertRuns, aggregator):
+    """Replay `runs` into `aggregator` and return its result."""
+    for code, code_runs in runs.runs.items():
+        variants = runs.variants[code]
+        aggregator.add(code, ((epoch, ts_str, count, variants[vid][1]) for epoch, ts_str, count, vid in code_runs))
+    return aggregator.result()
+
+def summarize(runs: AlertRuns, since: float = NO_WINDOW,
+              mapping: Optional[Dict[str, Dict[str, str]]] = None, kinds=("ORA",),
+              matcher: Optional[EventMatcher] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    code -> {first, last, info, count} over occurrences at/after `since`, with cause/action given
+    a mapping. Only ORA codes by default; `kinds` picks other patterns of `matcher` (None: all keys).
+    """
+    agg = FirstLastCount()
+    if since != NO_WINDOW:
+        agg = Window(since, agg)
+    if kinds is not None:
+        agg = Kinds(kinds, agg, matcher)
+    if mapping is not None:
+        agg = MappingJoin(mapping, agg)
+    out = aggregate(runs, agg)
+    for code, meta in out.items():
+        first = runs.first.get(code)
+        if first is not None and first[0] == meta["first_e"]:
+            meta["info"] = first[2]  # the occurrence's own message, not its template's
+    return out
+
+def _alert_text_lines(raw: bytes) -> List[str]:
+    """Decode one b"...\n" chunk into the line(s) text-mode reading would give (\r, \r\n, \n endings)."""
+    line = raw.decode("utf-8", errors="replace")
+    if line.endswith("\n"):
+        line = line[:-1]
+    if line.endswith("\r"):
+        line = line[:-1]
+    return line.split("\r") if "\r" in line else [line]
+
+def _scan_alert_lines(lines, runs: AlertRuns, cur: Optional[list], since: float, local_offset: int,
+                      matcher: EventMatcher = DEFAULT_MATCHER, path: Optional[str] = None) -> Optional[list]:
+    """
+    Feed alert log lines into `runs`; `cur` is the governing timestamp [epoch, ts_str, offset]
+    (or None) before the first line, and the one after the last line is returned.
+    Naive timestamps are local time (`local_offset` s east of UTC), aware ones are compared as instants.
+    With `path`, `lines` yields (byte offset, line) pairs and the occurrences are indexed.
+    """
+    triggers, folded = matcher.triggers, matcher.folded_triggers
+    pos = -1
+    for line in lines:
+        if path is not None:
+            pos, line = line
+        epoch = ts_epoch(line, local_offset)
+        if epoch is not None:
+            cur = [epoch, line.strip(), pos]; continue
+        for t in triggers:
+            if t in line: break
+        else:
+            if not folded: continue
+            low = line.lower()
+            for t in folded:
+                if t in low: break
+            else:
+                continue
+        if cur is None or cur[0] < since: continue
+        at = (path, pos, cur[2]) if path is not None else None
+        for key, info in matcher.classify(line):
+            runs.add(key, cur[0], cur[1], info, at)
+    return cur
+
+# Logs at least this big are not read from byte 0: the window start is found by binary search
+_ALERT_SEEK_MIN_BYTES = 8 * 1024 * 1024
+_ALERT_SEEK_BLOCK = 64 * 1024
+
+def _alert_window_start(fp, size: int, since: float, local_offset: int, epoch_of=ts_epoch) -> int:
+    """
+    Line-boundary offset from which reading an append-ordered (by time) alert log finds every
+    timestamp >= `since`. Binary search over byte offsets: each probe resynchronises on the
+    next line and reads forward to the first timestamp line (`epoch_of(line, local_offset)`).
+    """
+    def first_ts(pos: int, limit: int) -> Optional[float]:
+        # epoch of the first timestamp line starting after `pos` and before `limit`
+        fp.seek(pos)
+        if pos: fp.readline()
+        while fp.tell() < limit:
+            raw = fp.readline()
+            if not raw: return None
+            for line in _alert_text_lines(raw):
+                epoch = epoch_of(line, local_offset)
+                if epoch is not None: return epoch
+        return None
+
+    # invariant: the first timestamp after lo is < since (or lo == 0);
+    #            the first timestamp after hi is >= since (or there is none)
+    lo, hi = 0, size
+    while hi - lo > _ALERT_SEEK_BLOCK:
+        mid = (lo + hi) // 2
+        epoch = first_ts(mid, hi)
+        if epoch is None or epoch >= since: hi = mid
+        else: lo = mid
+    if lo == 0:
+        return 0
+    fp.seek(lo); fp.readline()
+    return fp.tell()
+
+# Byte ranges at least this big are split over `workers` processes
+_ALERT_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+def _last_line_end(fp, size: int) -> int:
+    """Offset just past the last b"\\n" (0 if none): everything before it is complete lines."""
+    pos = size
+    while pos > 0:
+        start = max(0, pos - _ALERT_SEEK_BLOCK)
+        fp.seek(start)
+        i = fp.read(pos - start).rfind(b"\n")
+        if i >= 0:
+            return start + i + 1
+        pos = start
+    return 0
+
+def _alert_chunk_bounds(fp, start: int, end: int, parts: int, local_offset: int) -> List[int]:
+    """Split [start, end) into up to `parts` ranges; every range after the first starts on a timestamp line."""
+    bounds = [start]
+    for i in range(1, parts):
+        fp.seek(max(start + (end - start) * i // parts, bounds[-1]))
+        fp.readline()
+        while fp.tell() < end:
+            at = fp.tell()
+            if ts_epoch(_alert_text_lines(fp.readline())[0], local_offset) is not None:
+                if at > bounds[-1]: bounds.append(at)
+                break
+    return bounds + [end]
+
+# Bytes-level scan: b"ORA-" hits are found in C, and only hit lines plus the timestamp lines
+# governing them are decoded. _ALERT_TS_START is a superset test for "could be a timestamp line"
+# (what _ts_fields does not reject outright); the decoded line still goes through ts_epoch().
+_ALERT_TS_START = re.compile(rb"[\t\x0b\x0c\x1c-\x1f ]*(?:[0-9]|[A-Za-z]{0,2}[\x80-\xff]|(?i:"
+                             + b"|".join(re.escape(d.encode()) for d in sorted(_WEEKDAYS)) + rb"))"
+                             if _REJECT_BY_WEEKDAY else rb"[\t\x0b\x0c\x1c-\x1f ]*[0-9A-Za-z\x80-\xff]")
+
+def _scan_alert_chunk(path: str, start: int, end: int, cur: Optional[list], since: float, local_offset: int,
+                      matcher: EventMatcher = DEFAULT_MATCHER):
+    """
+    Process-pool entry point: (AlertRuns, governing timestamp after the range) for complete
+    lines in [start, end). With CR line breaks an offset is that of the \n-terminated block.
+    """
+    runs = AlertRuns()
+    if end <= start:
+        return runs, cur
+    with open(path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"\r", start, end) >= 0:
+            # CR / CRLF line breaks: decode every line like text mode does
+            fp.seek(start)
+            def lines():
+                pos = start
+                while pos < end:
+                    raw = fp.readline()
+                    if not raw: return
+                    for line in _alert_text_lines(raw):
+                        yield pos, line
+                    pos += len(raw)
+            cur = _scan_alert_lines(lines(), runs, cur, since, local_offset, matcher, path)
+            return runs, cur
+
+        def last_ts(hi: int, lo: int) -> Optional[list]:
+            # latest timestamp line among the lines in [lo, hi), walking back from hi
+            while hi > lo:
+                ps = mm.rfind(b"\n", lo, hi - 1) + 1 or lo
+                if _ALERT_TS_START.match(mm, ps, hi - 1):
+                    line = mm[ps:hi - 1].decode("utf-8", errors="replace")
+                    epoch = ts_epoch(line, local_offset)
+                    if epoch is not None:
+                        return [epoch, line.strip(), ps]
+                hi = ps
+            return None
+
+        floor = start  # lines before this offset have been accounted for
+        for p in matcher.hits(mm, start, end):
+            if p < floor:
+                continue  # another trigger on a line already handled
+            ls = mm.rfind(b"\n", floor, p) + 1 or floor
+            le = mm.find(b"\n", p, end)
+            ts = last_ts(ls, floor)
+            if ts is not None: cur = ts
+            floor = le + 1
+            if cur is None or cur[0] < since: continue
+            at = (path, ls, cur[2])
+            for key, info in matcher.classify(mm[ls:le].decode("utf-8", errors="replace")):
+                runs.add(key, cur[0], cur[1], info, at)
+        ts = last_ts(end, floor)
+        if ts is not None: cur = ts
+    return runs, cur
+
+# ADR log.xml: a sequence of <msg time='...' ...><txt>...</txt></msg> records (no root element)
+_XML_MSG_TIME_RE = re.compile(r"\s*<msg\b[^>]*?\btime=(['\"])(.*?)\1")
+
+def _xml_msg_epoch(line: str, local_offset: int) -> Optional[float]:
+    """Epoch of a log.xml line opening a <msg> record, None for any other line."""
+    m = _XML_MSG_TIME_RE.match(line)
+    return ts_epoch(m.group(2), local_offset) if m else None
+
+def _is_alert_xml(path: Path) -> bool:
+    return path.name.lower().endswith(".xml")
+
+def _last_msg_end(fp, size: int) -> int:
+    """Offset just past the last complete </msg> record (0 if none)."""
+    if not size:
+        return 0
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        i = mm.rfind(b"</msg>")
+        if i < 0:
+            return 0
+        nl = mm.find(b"\n", i, i + 64)
+        return nl + 1 if nl >= 0 else i + len(b"</msg>")
+
+def _scan_alert_xml(path: str, start: int, end: int, since: float, local_offset: int,
+                    matcher: EventMatcher = DEFAULT_MATCHER) -> AlertRuns:
+    """
+    Runs for the log.xml records in [start, end), indexed at the record's offset. Only records holding a trigger can contribute:
+    those are fed to one streaming XMLPullParser (inside a dummy root) and cleared once read,
+    so memory stays flat and the rest of the file is never parsed. Raises ET.ParseError on bad XML.
+    """
+    runs = AlertRuns()
+    if end <= start:
+        return runs
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parser.feed(b"<log>")
+    root = None
+    with open(path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        floor = start  # records before this offset have been handled
+        for p in matcher.hits(mm, start, end):
+            if p < floor:
+                continue
+            rs = mm.rfind(b"<msg", floor, p)
+            re_ = mm.find(b"</msg>", p, end)
+            if re_ < 0:
+                break
+            floor = re_ + len(b"</msg>")
+            if rs < 0:
+                continue  # record started before `start` (window seek landed inside it)
+            at = (path, rs, rs)
+            parser.feed(mm[rs:floor])
+            for ev, el in parser.read_events():
+                if root is None:
+                    root = el; continue
+                if ev != "end" or el.tag != "msg":
+                    continue
+                ts_str = (el.get("time") or "").strip()
+                epoch = ts_epoch(ts_str, local_offset)
+                if epoch is not None and epoch >= since:
+                    for line in (el.findtext("txt") or "").splitlines():
+                        for key, info in matcher.classify(line):
+                            runs.add(key, epoch, ts_str, info, at)
+                root.clear()
+    return runs
+
+def _scan_alert_range(alert_path: Path, fp, start: int, end: int, runs: AlertRuns, cur: Optional[list],
+                      since: float, local_offset: int, workers: int = 1,
+                      matcher: EventMatcher = DEFAULT_MATCHER,
+                      log: Optional[Callable[[str], None]] = None) -> Optional[list]:
+    """
+    Add the complete lines in [start, end) to `runs`. Big ranges are cut on timestamp lines
+    and parsed in a process pool; the partial runs are appended back in file order.
+    `log` gets a note when the pool fails and the range is scanned serially instead.
+    """
+    if workers > 1 and end - start >= _ALERT_PARALLEL_MIN_BYTES:
+        bounds = _alert_chunk_bounds(fp, start, end, workers * 4, local_offset)
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(bounds) - 1)) as pool:
+                futs = [pool.submit(_scan_alert_chunk, str(alert_path), a, b, cur if i == 0 else None, since, local_offset, matcher)
+                        for i, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+                parts = [f.result() for f in futs]
+            for part_runs, part_cur in parts:
+                runs.extend(part_runs)
+                if part_cur is not None: cur = part_cur
+            return cur
+        except Exception as e:
+            if log: log(f"⚠️ Parallel alert scan failed ({e}); scanning serially")
+    part_runs, cur = _scan_alert_chunk(str(alert_path), start, end, cur, since, local_offset, matcher)
+    runs.extend(part_runs)
+    return cur
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# How much of a log's head/tail is read to find its first/last timestamp
+_ALERT_SPAN_BYTES = 1024 * 1024
+
+# Most of a log.xml record read back by reread_first()
+_FIRST_RECORD_BYTES = 64 * 1024
+
+def reread_first(runs: AlertRuns, alert_path: Path, matcher: EventMatcher = DEFAULT_MATCHER) -> None:
+    """
+    Read back from the log the message of the `first` occurrences prune() left in
+    runs.stale_first, through the offset index (a text line, or a log.xml record). Codes
+    without indexed offsets (gzip'd logs) keep the message of the occurrence's template.
+    """
+    codes = runs.offsets.get(str(alert_path), {})
+    stale = [c for c in runs.stale_first if c in codes]
+    if not stale:
+        return
+    try:
+        with alert_path.open("rb") as fp:
+            for code in stale:
+                first = runs.first[code]
+                epochs, pos, _ = codes[code]
+                i = next((i for i, e in enumerate(epochs) if e == first[0]), None)
+                if i is None:
+                    continue
+                fp.seek(pos[i])
+                if _is_alert_xml(alert_path):
+                    raw = fp.read(_FIRST_RECORD_BYTES)
+                    end = raw.find(b"</msg>")
+                    if end < 0:
+                        continue
+                    txt = ET.fromstring(raw[:end + len(b"</msg>")]).findtext("txt") or ""
+                    lines = txt.splitlines()
+                else:
+                    lines = _alert_text_lines(fp.readline())
+                info = next((info for line in lines for key, info in matcher.classify(line) if key == code), None)
+                if info is not None:
+                    first[2] = info
+                    runs.stale_first.discard(code)
+    except (OSError, ET.ParseError):
+        pass
+
+def _scan_alert_file(alert_path: Path, since: float, local_tz, checkpoints=None, workers: int = 1,
+                     matcher: EventMatcher = DEFAULT_MATCHER) -> Tuple[AlertRuns, List[str]]:
+    """
+    (AlertRuns, debug notes) for the events of `matcher` at/after `since` (epoch) in one log,
+    with the byte offsets of the occurrences (not for gzip'd logs). With checkpoints only the bytes appended since the last run are read, and the new position
+    is stored again. Without one, big logs are read from the window start, not byte 0.
+    A gzip'd (rotated, hence complete) log is streamed whole unless its checkpoint covers it;
+    an ADR log.xml is read record by record (_scan_alert_xml).
+    Also the process-pool entry point when several logs are scanned at once.
+    """
+    notes = []
+    path = str(alert_path)
+    tz_key = str(local_tz)
+    local_offset = _local_offset(local_tz)
+    state = None
+    # one checkpoint per pattern set and window length (in days), so e.g. a 30-day and a
+    # 92-day report over the same log do not keep invalidating each other's
+    span = "all" if since == NO_WINDOW else str(round((datetime.now().timestamp() - since) / 86400))
+    scope = f"{matcher.signature}|{span}"
+    if checkpoints:
+        state, reason = checkpoints.load(alert_path, since, tz_key, scope)
+        if state and state.get("patterns") != matcher.signature:
+            state, reason = None, "event pattern table changed"
+        elif state and (state.get("runs_format") != AlertRuns.FORMAT or "offsets" not in state):
+            state, reason = None, "checkpoint runs format changed"
+        notes.append(f"[debug] Alert checkpoint ({alert_path.name}): {reason}")
+    if state:
+        runs = AlertRuns(state["runs"], AlertRuns.offsets_from_state(path, state["offsets"]), state["variants"],
+                         state["first"])
+        runs.prune(since)  # the template counts and first occurrences cover the current window only
+        reread_first(runs, alert_path, matcher)
+        cur, offset = state["ts"], state["offset"]
+    else:
+        runs, cur, offset = AlertRuns(), None, 0
+
+    tail = b""
+    with alert_path.open("rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if fp.read(2) == _GZIP_MAGIC:
+            end = size
+            if offset < size:
+                runs, cur = AlertRuns(), None
+                fp.seek(0)
+                with gzip.GzipFile(fileobj=fp) as gz:
+                    lines = (line for raw in gz for line in _alert_text_lines(raw))
+                    cur = _scan_alert_lines(lines, runs, cur, since, local_offset, matcher)
+        elif _is_alert_xml(alert_path):
+            if not state and size >= _ALERT_SEEK_MIN_BYTES:
+                offset = _alert_window_start(fp, size, since, local_offset, _xml_msg_epoch)
+                notes.append(f"[debug] Alert log {alert_path.name} window starts at byte {offset:,} of {size:,}")
+            end = max(offset, _last_msg_end(fp, size))  # an unfinished last record is read next time
+            runs.extend(_scan_alert_xml(path, offset, end, since, local_offset, matcher))
+        else:
+            if not state and size >= _ALERT_SEEK_MIN_BYTES:
+                offset = _alert_window_start(fp, size, since, local_offset)
+                notes.append(f"[debug] Alert log {alert_path.name} window starts at byte {offset:,} of {size:,}")
+            end = max(offset, _last_line_end(fp, size))
+            cur = _scan_alert_range(alert_path, fp, offset, end, runs, cur, since, local_offset, workers, matcher,
+                                    notes.append)
+            fp.seek(end)
+            tail = fp.read()  # unterminated last line: counted now, re-read next time
+
+    if checkpoints:
+        # the window only moves forward between regular runs: keep what it still covers
+        runs.prune(since)
+        checkpoints.save(alert_path, {"offset": end, "ts": cur, "horizon": since, "tz": tz_key,
+                                      "patterns": matcher.signature, "runs": runs.runs, "variants": runs.variants,
+                                      "first": runs.first,
+                                      "runs_format": AlertRuns.FORMAT, "offsets": runs.offsets_state(path)}, scope)
+    if tail:
+        _scan_alert_lines(((end, line) for line in _alert_text_lines(tail)), runs, cur, since, local_offset, matcher, path)
+    return runs, notes
+
+def _alert_log_span(alert_path: Path, local_offset: int) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (first, last) timestamp epochs of a log from its head and tail; None when there is none
+    there. The end of a gzip'd log is not decompressed just for this, so its last is None.
+    """
+    epoch_of = _xml_msg_epoch if _is_alert_xml(alert_path) else ts_epoch
+
+    def first_ts(raws) -> Optional[float]:
+        for raw in raws:
+            for line in _alert_text_lines(raw):
+                epoch = epoch_of(line, local_offset)
+                if epoch is not None:
+                    return epoch
+        return None
+
+    try:
+        with alert_path.open("rb") as fp:
+            size = os.fstat(fp.fileno()).st_size
+            is_gz = fp.read(2) == _GZIP_MAGIC
+            fp.seek(0)
+            if is_gz:
+                with gzip.GzipFile(fileobj=fp) as gz:
+                    head = gz.read(_ALERT_SPAN_BYTES)
+                    at_eof = not gz.read(1)
+            else:
+                head = fp.read(_ALERT_SPAN_BYTES)
+                at_eof = fp.tell() >= size
+            raws = head.splitlines(keepends=True)
+            if raws and not at_eof and not raws[-1].endswith(b"\n"):
+                raws.pop()  # cut off mid-line
+            first = first_ts(raws)
+            if is_gz:
+                return first, None
+            start = max(0, size - _ALERT_SPAN_BYTES)
+            fp.seek(start)
+            raws = fp.read().splitlines(keepends=True)
+            if raws and start:
+                raws.pop(0)
+            return first, first_ts(reversed(raws))
+    except Exception:
+        return None, None
+
+def _local_offset(local_tz) -> int:
+    return int(local_tz.utcoffset(None).total_seconds())
+
+def _local_tz():
+    return datetime.now().astimezone().tzinfo
+
+# ---------- entry points ----------
+# ADR alert log names: log.xml and its rotations log_1.xml, log_2.xml, ...
+_ADR_XML_NAME_RE = re.compile(r"(?i)^log(?:_\d+)?\.xml$")
+# The ADR home named in a record (adr_home attribute or a trace file path): .../diag/rdbms/<db>/<instance>
+_ADR_HOME_RE = re.compile(rb"diag[/\\]rdbms[/\\]([^/\\'\"<>\s]+)[/\\]([^/\\'\"<>\s]+)")
+_ALERT_SID_RE = re.compile(r"(?i)^alert_(.+?)\.log")
+
+def alert_log_sid(path: Path) -> Optional[str]:
+    """Instance name of a text alert log (alert_<SID>.log, .log.1, .log.gz, ...)."""
+    m = _ALERT_SID_RE.match(path.name)
+    return m.group(1) if m else None
+
+def _adr_homes(path: Path) -> set:
+    """Lower-cased db and instance names of the ADR homes named in the head of a log.xml."""
+    try:
+        with path.open("rb") as fp:
+            head = fp.read(_ALERT_SPAN_BYTES)
+    except OSError:
+        return set()
+    return {name.decode("utf-8", errors="replace").lower() for m in _ADR_HOME_RE.finditer(head) for name in m.groups()}
+
+def _name_match(home: str, want: str) -> int:
+    """2: same name; 1: one is the other plus an instance number (db cdb1, instance cdb11); 0: no match."""
+    if home == want:
+        return 2
+    if re.fullmatch(re.escape(want) + r"\d+", home) or re.fullmatch(re.escape(home) + r"\d+", want):
+        return 1
+    return 0
+
+def xml_candidates(log_dir: Path, dbname: Optional[str] = None, sids: List[str] = ()) -> List[Path]:
+    """
+    ADR log.xml and its rotations (log_1.xml, ...) in the log folder or its alert/ subfolder.
+    Given the DB (folder) name and/or the instance names of its text alert logs, a log.xml whose
+    records name another ADR home (.../diag/rdbms/<db>/<instance>) is left out; one that names
+    none cannot be told apart and is kept. A home matches a wanted name exactly or with a trailing
+    instance number; when some log.xml matches exactly, those that only match by instance number
+    (CDB1's next to CDB10's) are left out too.
+    """
+    found = sorted(p for d in (log_dir, log_dir / "alert") if d.is_dir()
+                   for p in d.iterdir() if p.is_file() and _ADR_XML_NAME_RE.match(p.name))
+    if dbname is None and not sids:
+        return found
+    want = [n.lower() for n in ([dbname] if dbname else []) + list(sids) if n]
+    levels = []
+    for p in found:
+        homes = _adr_homes(p)
+        levels.append(None if not homes else max(_name_match(h, w) for h in homes for w in want))
+    best = max((lv for lv in levels if lv is not None), default=0)
+    return [p for p, lv in zip(found, levels) if lv is None or (lv and lv == best)]
+
+def logs_first_ts(alert_paths: List[Path], local_tz=None) -> Optional[float]:
+    """Earliest first timestamp (epoch) of the logs, None when none has one."""
+    local_offset = _local_offset(local_tz or _local_tz())
+    firsts = [f for f in (_alert_log_span(p, local_offset)[0] for p in alert_paths) if f is not None]
+    return min(firsts, default=None)
+
+def log_candidates(log_dir: Path, dbname: str) -> List[Path]:
+    """Current, rotated (alert_X.log.1, alert_X.log-20240101) and gzip'd alert logs of a DB."""
+    for pattern in (f"alert_{dbname}*.log*", "alert_*.log*"):
+        found = [p for p in log_dir.glob(pattern)
+                 if p.is_file() and not p.name.lower().endswith((".zip", ".bz2", ".xz", ".zst", ".tar", ".tgz"))]
+        if found:
+            return sorted(found)
+    return []
+
+def scan_alert_lines(lines, since: float = NO_WINDOW, local_tz=None,
+                     matcher: EventMatcher = DEFAULT_MATCHER) -> AlertRuns:
+    """Runs for text lines from any iterable (e.g. a file opened in text mode)."""
+    runs = AlertRuns()
+    _scan_alert_lines(lines, runs, None, since, _local_offset(local_tz or _local_tz()), matcher)
+    return runs
+
+def scan_alert_logs(alert_paths: List[Path], since: float = NO_WINDOW, local_tz=None, checkpoints=None,
+                    workers: int = 1, log: Optional[Callable[[str], None]] = print,
+                    matcher: EventMatcher = DEFAULT_MATCHER) -> AlertRuns:
+    """
+    Runs for the events of `matcher` (ORA- and DEFAULT_EVENT_PATTERNS unless given) at/after
+    `since` (epoch) over one or more logs of a DB. Logs whose
+    last timestamp is before `since` are skipped; the rest are scanned (in `workers` processes
+    when > 1) and merged in order of their first timestamp, i.e. as if the logs had been one
+    file in time order. `checkpoints` is an alert_checkpoint.AlertCheckpoints or None;
+    `log` gets the debug lines (None: quiet).
+    """
+    local_tz = local_tz or _local_tz()
+    local_offset = _local_offset(local_tz)
+    log = log or (lambda msg: None)
+    spans = []
+    for p in alert_paths:
+        first, last = _alert_log_span(p, local_offset)
+        if last is not None and last < since:
+            log(f"[debug] Skipping {p.name}: last entry is before the window")
+            continue
+        spans.append((first, p))
+    spans.sort(key=lambda s: (s[0] is None, s[0] or 0.0, s[1].name))
+    paths = [p for _, p in spans]
+    log(f"[debug] Scanning alert logs: {[p.name for p in paths]}")
+
+    results = None
+    if workers > 1 and len(paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                futs = [pool.submit(_scan_alert_file, p, since, local_tz, checkpoints, 1, matcher) for p in paths]
+                results = [f.result() for f in futs]
+        except Exception as e:
+            log(f"⚠️ Parallel alert scan failed ({e}); scanning serially")
+    if results is None:
+        results = [_scan_alert_file(p, since, local_tz, checkpoints, workers, matcher) for p in paths]
+
+    merged = AlertRuns()
+    for runs, notes in results:
+        for note in notes:
+            log(note)
+        merged.extend(runs)
+    return merged
+
+# ---------- offset index (drill-down without rescanning) ----------
+_INDEX_VERSION = 1
+_INDEX_HEAD_BYTES = 4096
+# How far around an occurrence alert-show reads for context lines
+_INDEX_CONTEXT_BYTES = 64 * 1024
+
+def _head_sha1(path: Path) -> str:
+    with path.open("rb") as fp:
+        return hashlib.sha1(fp.read(_INDEX_HEAD_BYTES)).hexdigest()
+
+def save_offset_index(runs: AlertRuns, out_path: Path) -> None:
+    """
+    Write the occurrence offsets of `runs` as a gzip'd JSON sidecar: per log (in scan order)
+    its path, size and head hash, and per code the line offsets as deltas and every timestamp
+    line's distance back from its line (-1: unknown).
+    """
+    logs = []
+    for path, codes in runs.offsets.items():
+        p = Path(path).resolve()
+        entry = {"path": str(p), "size": p.stat().st_size, "head_sha1": _head_sha1(p), "codes": {}}
+        for code, (_, pos, ts_pos) in codes.items():
+            prev, deltas = 0, []
+            for x in pos:
+                deltas.append(x - prev); prev = x
+            entry["codes"][code] = {"pos": deltas, "ts_back": [x - t if t >= 0 else -1 for x, t in zip(pos, ts_pos)]}
+        logs.append(entry)
+    payload = json.dumps({"version": _INDEX_VERSION, "logs": logs}, separators=(",", ":")).encode("utf-8")
+    out_path.write_bytes(gzip.compress(payload))
+
+def load_offset_index(path: Path) -> List[Dict[str, Any]]:
+    """The logs of a save_offset_index() sidecar, with absolute offsets: code -> [(pos, ts_pos)]."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != _INDEX_VERSION:
+        raise ValueError(f"unsupported alert index version: {data.get('version')}")
+    logs = []
+    for entry in data["logs"]:
+        codes = {}
+        for code, idx in entry["codes"].items():
+            pos, occ = 0, []
+            for d, back in zip(idx["pos"], idx["ts_back"]):
+                pos += d
+                occ.append((pos, pos - back if back >= 0 else -1))
+            codes[code] = occ
+        logs.append(dict(entry, codes=codes))
+    return logs
+
+def _read_line_at(fp, pos: int) -> str:
+    fp.seek(pos)
+    return fp.readline().decode("utf-8", errors="replace").rstrip("\r\n")
+
+def show_occurrences(logs: List[Dict[str, Any]], code: str, n: int = 20, context: int = 3,
+                     out: Callable[[str], None] = print) -> int:
+    """
+    Print the last `n` occurrences of `code` (oldest first) straight from the logs: the
+    timestamp line, `context` lines before and after, and the line itself marked ">"
+    (log.xml: the whole <msg> record). Returns how many occurrences the index holds for the code.
+    """
+    occs = [(entry, pos, ts_pos) for entry in logs for pos, ts_pos in entry["codes"].get(code, [])]
+    shown = occs[-n:] if n > 0 else occs
+    checked: Dict[Path, bool] = {}
+    for k, (entry, pos, ts_pos) in enumerate(shown, len(occs) - len(shown) + 1):
+        path = Path(entry["path"])
+        if path not in checked:
+            if not path.exists():
+                out(f"⚠️ {path} not found"); checked[path] = False
+            else:
+                checked[path] = True
+                if path.stat().st_size < entry["size"] or _head_sha1(path) != entry["head_sha1"]:
+                    out(f"⚠️ {path.name} changed since the report was built; offsets may not match")
+        if not checked[path]:
+            continue
+        out(f"--- {path.name} @ byte {pos:,} ({k} of {len(occs)}) ---")
+        with path.open("rb") as fp:
+            if _is_alert_xml(path):
+                fp.seek(pos)
+                rec = fp.read(_INDEX_CONTEXT_BYTES)
+                i = rec.find(b"</msg>")
+                for j, raw in enumerate((rec[:i + len(b"</msg>")] if i >= 0 else rec).split(b"\n")):
+                    out(("> " if j == 0 else "  ") + raw.decode("utf-8", errors="replace").rstrip("\r"))
+                continue
+            lo = max(0, pos - _INDEX_CONTEXT_BYTES)
+            fp.seek(lo)
+            before = fp.read(pos - lo).split(b"\n")[:-1]
+            if lo and before:
+                before.pop(0)  # cut off mid-line
+            before = before[-context:] if context > 0 else []
+            first_shown = pos - sum(len(b) + 1 for b in before)
+            if 0 <= ts_pos < first_shown:
+                out("  " + _read_line_at(fp, ts_pos))
+                if fp.tell() < first_shown:
+                    out("  ...")
+            for raw in before:
+                out("  " + raw.decode("utf-8", errors="replace").rstrip("\r"))
+            fp.seek(pos)
+            for i, raw in enumerate(fp.read(_INDEX_CONTEXT_BYTES).split(b"\n")[:context + 1]):
+                out(("> " if i == 0 else "  ") + raw.decode("utf-8", errors="replace").rstrip("\r"))
+    return len(occs)
+
+def bench(alert_path: Path, workers: int = 1, xml_path: Optional[Path] = None,
+          matcher: EventMatcher = DEFAULT_MATCHER) -> None:
+    """
+    Time a whole-log alert scan (no window, seek or checkpoint): ORA- only vs the `matcher`
+    pattern table, serial vs `workers` processes, and, given the ADR log.xml of the same log,
+    the XML reader against a plain full iterparse.
+    """
+    import time
+    local_offset = _local_offset(_local_tz())
+    results = []
+    runs = AlertRuns()
+    with alert_path.open("rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        end = _last_line_end(fp, size)
+        passes = [("ORA- only", EventMatcher([]), 1), (f"{len(matcher.patterns)} patterns", matcher, 1)]
+        if workers > 1:
+            passes.append((f"{len(matcher.patterns)} patterns", matcher, workers))
+        for label, m, n in passes:
+            runs = AlertRuns()
+            t0 = time.perf_counter()
+            _scan_alert_range(alert_path, fp, 0, end, runs, None, NO_WINDOW, local_offset, n, m, print)
+            el = time.perf_counter() - t0
+            results.append(summarize(runs))
+            print(f"{alert_path.name}: {size / 1e6:,.0f} MB, {label}, {n} worker(s): {el:.2f}s ({size / 1e6 / max(el, 1e-9):,.1f} MB/s)")
+    print("ORA results identical" if all(r == results[0] for r in results) else "❌ ORA results differ")
+    kinds: Dict[str, int] = {}
+    for key, key_runs in runs.runs.items():
+        kind = matcher.kind_of(key)
+        kinds[kind] = kinds.get(kind, 0) + sum(r[2] for r in key_runs)
+    print("events: " + ", ".join(f"{k} {v:,}" for k, v in sorted(kinds.items())))
+    if not xml_path:
+        return
+
+    def report(label: str, el: float, size: int) -> None:
+        print(f"{xml_path.name} {label}: {size / 1e6:,.0f} MB, {el:.2f}s ({size / 1e6 / max(el, 1e-9):,.1f} MB/s)")
+
+    with xml_path.open("rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        t0 = time.perf_counter()
+        xml_runs = _scan_alert_xml(str(xml_path), 0, _last_msg_end(fp, size), NO_WINDOW, local_offset, matcher)
+        report("trigger records only", time.perf_counter() - t0, size)
+        # reference: every record through iterparse
+        t0 = time.perf_counter()
+        fp.seek(0)
+        parser = ET.XMLPullParser(events=("start", "end"))
+        parser.feed(b"<log>")
+        root, full = None, AlertRuns()
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            parser.feed(chunk)
+            for ev, el in parser.read_events():
+                if root is None:
+                    root = el; continue
+                if ev == "end" and el.tag == "msg":
+                    ts_str = el.get("time") or ""
+                    for line in (el.findtext("txt") or "").splitlines():
+                        for key, info in matcher.classify(line):
+                            full.add(key, ts_epoch(ts_str, local_offset), ts_str, info)
+                    root.clear()
+        report("full iterparse", time.perf_counter() - t0, size)
+    # timestamps are written differently in the two files: compare what they count
+    counts = lambda agg: {code: meta["count"] for code, meta in agg.items()}
+    xml_counts = counts(summarize(xml_runs, kinds=None))
+    print("XML counts identical" if xml_counts == counts(summarize(full, kinds=None)) else "❌ XML readers differ")
+    print("text and XML counts identical" if xml_counts == counts(summarize(runs, kinds=None)) else "❌ text and XML counts differ")
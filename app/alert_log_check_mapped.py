@@ -1,42 +1,22 @@
 #!/usr/bin/env python3
-import sys, re, csv
+import sys, csv, gzip, hashlib, json
+from pathlib import Path
+
+import alert_engine
+from awr_cache import atomic_write
+
+# Compiled mappings (gzip'd JSON per mapping CSV content) under the user cache; opt-in
+DEFAULT_MAPPING_CACHE_DIR = Path.home() / ".cache" / "pm_helper" / "mapping"
+_MAPPING_CACHE_VERSION = 1
+# (resolved path, size, mtime_ns) -> mapping, for this process (and forked workers)
+_loaded = {}
 
 def parse_alerts(fp):
-    ts_re = re.compile(r'^\d{4}-\d{2}-\d{2}T\S+$')
-    ora_re = re.compile(r'^(ORA-\d{5}):\s*(.*)$')
-
-    current_ts = None
-    # key: code -> {'first': ts_or_none, 'info': info_of_first, 'count': n}
-    agg = {}
-
-    def is_earlier(a, b):
-        if a is None and b is None: return False
-        if a is None: return False
-        if b is None: return True
-        return a < b
-
-    for raw in fp:
-        line = raw.rstrip('\n')
-        if ts_re.match(line):
-            current_ts = line.strip()
-            continue
-
-        m = ora_re.match(line)
-        if m:
-            code = m.group(1).strip()
-            info = m.group(2).strip()
-
-            if code not in agg:
-                agg[code] = {'first': current_ts, 'info': info, 'count': 1}
-            else:
-                agg[code]['count'] += 1
-                if is_earlier(current_ts, agg[code]['first']):
-                    agg[code]['first'] = current_ts
-                    agg[code]['info'] = info
-                elif agg[code]['first'] is None and current_ts is not None:
-                    agg[code]['first'] = current_ts
-                    agg[code]['info'] = info
-    return agg
+    """
+    key: code -> {'first': ts_or_none, 'info': info_of_first, 'count': n} (plus 'last') for the
+    lines of `fp` (text mode). Same rules as the PM alert report, see alert_engine.
+    """
+    return alert_engine.summarize(alert_engine.scan_alert_lines(fp))
 
 def sniff_encoding(path):
     try:
@@ -50,10 +30,8 @@ def sniff_encoding(path):
         pass
     return 'utf-8'
 
-def load_mapping(map_path):
+def _parse_mapping(map_path):
     mapping = {}
-    if not map_path:
-        return mapping
     enc = sniff_encoding(map_path)
     with open(map_path, 'r', encoding=enc, errors='replace', newline='') as f:
         reader = csv.DictReader(f)
@@ -67,20 +45,79 @@ def load_mapping(map_path):
             code = (row.get(code_key) or '').strip()
             if not code: 
                 continue
-            mapping[code] = {
-                'cause': (row.get(cause_key) or '').strip() if cause_key else '',
-                'action': (row.get(action_key) or '').strip() if action_key else '',
+            # many codes share the same cause/action text: keep one copy of each
+            mapping[sys.intern(code)] = {
+                'cause': sys.intern((row.get(cause_key) or '').strip()) if cause_key else '',
+                'action': sys.intern((row.get(action_key) or '').strip()) if action_key else '',
             }
     return mapping
 
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_compiled(entry):
+    """mapping from a compiled sidecar, None if missing/unreadable"""
+    try:
+        with gzip.open(entry, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != _MAPPING_CACHE_VERSION:
+            return None
+        texts = [sys.intern(t) for t in data['texts']]
+        return {sys.intern(code): {'cause': texts[c], 'action': texts[a]}
+                for code, (c, a) in data['codes'].items()}
+    except Exception:
+        return None
+
+def _save_compiled(entry, mapping):
+    # each distinct cause/action text is stored once, rows refer to it by index
+    ids = {}
+    codes = {code: [ids.setdefault(row['cause'], len(ids)), ids.setdefault(row['action'], len(ids))]
+             for code, row in mapping.items()}
+    data = {'version': _MAPPING_CACHE_VERSION, 'texts': list(ids), 'codes': codes}
+    try:
+        atomic_write(entry, gzip.compress(json.dumps(data, separators=(',', ':')).encode('utf-8')))
+    except Exception:
+        pass
+
+def load_mapping(map_path, cache_dir=None):
+    """
+    code -> {'cause', 'action'} from the mapping CSV. Parsed once per process (per file
+    version). With `cache_dir` the parsed dict is also kept there as gzip'd JSON named by
+    the SHA-1 of the CSV content, so a later process skips the CSV parse while the content
+    is unchanged (whatever its path or mtime). The returned dict is shared: treat it as read-only.
+    """
+    if not map_path:
+        return {}
+    map_path = Path(map_path).resolve()
+    st = map_path.stat()
+    key = (str(map_path), st.st_size, st.st_mtime_ns)
+    mapping = _loaded.get(key)
+    if mapping is not None:
+        return mapping
+    entry = None
+    if cache_dir:
+        entry = Path(cache_dir) / f"{_file_sha1(map_path)}-v{_MAPPING_CACHE_VERSION}.json.gz"
+        mapping = _load_compiled(entry)
+    if mapping is None:
+        mapping = _parse_mapping(map_path)
+        if entry is not None:
+            _save_compiled(entry, mapping)
+    _loaded[key] = mapping
+    return mapping
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: alert_log_check_mapped.py <alert_log_file> [--no-header] [--map mapping.csv]")
+        print("Usage: alert_log_check_mapped.py <alert_log_file> [--no-header] [--map mapping.csv] [--cache]")
         sys.exit(1)
 
     path = sys.argv[1]
     show_header = True
     map_path = None
+    cache_dir = None
 
     i = 2
     while i < len(sys.argv):
@@ -90,11 +127,14 @@ def main():
         elif sys.argv[i] == "--map" and i + 1 < len(sys.argv):
             map_path = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == "--cache":
+            cache_dir = DEFAULT_MAPPING_CACHE_DIR
+            i += 1
         else:
             i += 1
 
-    with open(path, 'r', encoding='utf-8', errors='replace') as fp:
-        agg = parse_alerts(fp)
+    runs = alert_engine.scan_alert_logs([Path(path)], log=None)
+    agg = alert_engine.summarize(runs, mapping=load_mapping(map_path, cache_dir))
 
     items = sorted(
         agg.items(),
@@ -105,22 +145,19 @@ def main():
         )
     )
 
-    mapping = load_mapping(map_path)
-
     w = csv.writer(sys.stdout, lineterminator='\n')
     header = ["Alert code","Alert info","first occur","count","cause","action"]
     if show_header:
         w.writerow(header)
 
     for code, meta in items:
-        m = mapping.get(code, {})
         w.writerow([
             code,
             meta['info'] or '',
             meta['first'] or '',
             meta['count'],
-            m.get('cause',''),
-            m.get('action',''),
+            meta['cause'],
+            meta['action'],
         ])
 
 if __name__ == "__main__":
@@ -11,14 +11,19 @@ Extracts and prints:
 """
 
 import argparse
+import html as _html
 import re
-from io import StringIO
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-import pandas as pd
 from bs4 import BeautifulSoup, NavigableString, Tag
 
+try: import numpy as np  # optional: advisory rules run as array operations when available
+except Exception: np = None
+
+# Bump whenever analyze() output changes: cached results (awr_cache) are keyed on it
+PARSER_VERSION = 5
 
 
 # ---------- helpers ----------
@@ -27,23 +32,18 @@ def _read_html(path: Path) -> BeautifulSoup:
     html = path.read_text(encoding="utf-8", errors="ignore")
     return BeautifulSoup(html, "html.parser")
 
-def _clean_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.map(" ".join)
-    df.columns = [str(c).replace("\xa0", " ").strip() for c in df.columns]
-    # de-dup column names to avoid pandas dropping duplicates
-    seen = {}
+def _dedup_cols(cols: List[str]) -> List[str]:
+    """Suffix repeated column names with .1, .2, ... so no column gets dropped."""
+    seen: Dict[str, int] = {}
     new_cols = []
-    for c in df.columns:
+    for c in cols:
         if c in seen:
             seen[c] += 1
             new_cols.append(f"{c}.{seen[c]}")
         else:
             seen[c] = 0
             new_cols.append(c)
-    df.columns = new_cols
-    return df
+    return new_cols
 
 _num_pat = re.compile(r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)")
 
@@ -58,25 +58,98 @@ def _contains_any(text: str, needles: List[str]) -> bool:
     t = text.lower()
     return any(n.lower() in t for n in needles)
 
-def _table_to_df(table: Tag) -> Optional[pd.DataFrame]:
+def _span(value: Any) -> int:
     try:
-        return pd.read_html(StringIO(str(table)), flavor="lxml")[0]
-    except Exception:
-        try:
-            return pd.read_html(StringIO(str(table)))[0]
-        except Exception:
-            return None
+        return max(1, int(str(value).strip()))
+    except (TypeError, ValueError):
+        return 1
+
+def _cell_text(cell: Tag) -> str:
+    return " ".join(cell.get_text().split())
+
+def _table_records(table: Union[Tag, str]) -> List[Dict[str, Any]]:
+    """
+    Rows of an HTML table as header-keyed dicts, straight from the <tr>/<td> cells.
+
+    Same shape pd.read_html + column cleaning + to_dict(orient="records") used to give:
+    <thead> rows (or leading all-<th> rows) are the header, a multi-row header is
+    joined with spaces, colspan/rowspan are expanded, repeated names get .1/.2
+    suffixes and a table without a header gets positional names "0", "1", ...
+    Cells keep the text shown in the report; empty cells are None, blank rows skipped.
+    """
+    if isinstance(table, str):
+        table = BeautifulSoup(table, "html.parser").find("table")
+        if table is None:
+            return []
+
+    grid: List[List[Tuple[str, bool]]] = []
+    in_thead: List[bool] = []
+    spans: Dict[int, Tuple[int, str, bool]] = {}  # column -> (rows left, text, is <th>)
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table:
+            continue  # row of a nested table
+        cells = tr.find_all(["td", "th"], recursive=False)
+        line: List[Tuple[str, bool]] = []
+        col = ci = 0
+        while ci < len(cells) or col in spans:
+            if col in spans:
+                left, text, is_th = spans.pop(col)
+                if left > 1:
+                    spans[col] = (left - 1, text, is_th)
+                line.append((text, is_th))
+                col += 1
+                continue
+            cell = cells[ci]
+            ci += 1
+            text, is_th, rowspan = _cell_text(cell), cell.name == "th", _span(cell.get("rowspan"))
+            for _ in range(_span(cell.get("colspan"))):
+                if rowspan > 1:
+                    spans[col] = (rowspan - 1, text, is_th)
+                line.append((text, is_th))
+                col += 1
+        if line:
+            grid.append(line)
+            in_thead.append(tr.find_parent("thead") is not None)
+
+    n_head = 0
+    if any(in_thead):
+        n_head = sum(in_thead)
+        grid = [r for r, h in zip(grid, in_thead) if h] + [r for r, h in zip(grid, in_thead) if not h]
+    else:
+        while n_head < len(grid) and all(is_th for _, is_th in grid[n_head]):
+            n_head += 1
+    header, body = grid[:n_head], grid[n_head:]
+    width = max((len(r) for r in grid), default=0)
+
+    names: List[str] = []
+    for i in range(width):
+        if not header:
+            names.append(str(i))
+            continue
+        parts = [r[i][0] if i < len(r) else "" for r in header]
+        if len(parts) == 1:
+            names.append(parts[0] or f"Unnamed: {i}")
+        else:
+            names.append(" ".join(p or f"Unnamed: {i}_level_{lvl}" for lvl, p in enumerate(parts)))
+    names = _dedup_cols(names)
+
+    records = []
+    for r in body:
+        values = [text or None for text, _ in r] + [None] * (width - len(r))
+        if any(v is not None for v in values):
+            records.append(dict(zip(names, values)))
+    return records
 
-def _find_table_by_summary(soup: BeautifulSoup, summary_patterns: List[str]) -> Optional[pd.DataFrame]:
+def _find_table_by_summary(soup: BeautifulSoup, summary_patterns: List[str]) -> List[Dict[str, Any]]:
     for tbl in soup.find_all("table"):
         summary = (tbl.get("summary") or "").lower()
         if any(re.search(pat, summary) for pat in summary_patterns):
-            df = _table_to_df(tbl)
-            if df is not None and not df.empty:
-                return _clean_cols(df)
-    return None
+            records = _table_records(tbl)
+            if records:
+                return records
+    return []
 
-def _find_table_by_title_then_next_table(soup: BeautifulSoup, title_patterns: List[str]) -> Optional[pd.DataFrame]:
+def _find_table_by_title_then_next_table(soup: BeautifulSoup, title_patterns: List[str]) -> List[Dict[str, Any]]:
     # match anywhere in the document (text or tag)
     def text_matches(node) -> bool:
         try:
@@ -86,22 +159,162 @@ def _find_table_by_title_then_next_table(soup: BeautifulSoup, title_patterns: Li
 
     anchor = soup.find(text_matches)
     if not anchor:
-        return None
+        return []
     start = anchor if isinstance(anchor, Tag) else (anchor.parent if hasattr(anchor, "parent") else None)
     if not start:
-        return None
+        return []
 
     nxt = start.find_next("table")
     if not nxt:
-        return None
-    df = _table_to_df(nxt)
-    return _clean_cols(df) if df is not None and not df.empty else None
+        return []
+    return _table_records(nxt)
+
+# ---------- document index ----------
+
+# section key -> (table summary regexes, section title fallbacks)
+_SECTIONS: Dict[str, Tuple[List[str], List[str]]] = {
+    "instance_efficiency": ([r"instance\s+efficiency\s+percentages"], ["Instance Efficiency Percentages"]),
+    "top10_events":        ([r"top\s+10.*wait\s+events.*total\s+wait\s+time"], ["Top 10 Foreground Events by Total Wait Time"]),
+    "pga_advisory":        ([r"pga.*advisory"], ["PGA Memory Advisory", "PGA Aggregate Target Advisory"]),
+    "sga_advisory":        ([r"sga.*target.*advisory"], ["SGA Target Advisory"]),
+    "thread_activity":     ([r"thread\s+activity\s+stats"], ["Instance Activity Stats - Thread Activity"]),
+    "sql_elapsed":         ([r"top\s+sql\s+by\s+elapsed\s+time"], ["SQL ordered by Elapsed Time"]),
+}
+_SECTION_RES = {key: [re.compile(p) for p in pats] for key, (pats, _) in _SECTIONS.items()}
+_HEADINGS = {"h1", "h2", "h3", "h4"}
+
+class AwrIndex:
+    """
+    Every table we care about in one AWR report, located in a single document pass.
+
+    Tables are keyed by section (see _SECTIONS): `by_summary` holds all tables whose
+    summary attribute matches, in document order; `by_title` holds the first table
+    following a heading that names the section. The snapshot table text is kept
+    so the DB Time lookup does not need the whole document text.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self.by_summary: Dict[str, List[Tag]] = {}
+        self.by_title: Dict[str, Tag] = {}
+        self.header_text = ""
+        pending: List[str] = []
+        # plain descendants walk: much cheaper than find_all() with a list of names
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                continue
+            if node.name in _HEADINGS:
+                title = node.get_text(" ", strip=True)
+                pending = [key for key, (_, titles) in _SECTIONS.items()
+                           if key not in self.by_title and _contains_any(title, titles)]
+                continue
+            if node.name != "table":
+                continue
+            summary = (node.get("summary") or "").lower()
+            if summary:
+                for key, res in _SECTION_RES.items():
+                    if any(r.search(summary) for r in res):
+                        self.by_summary.setdefault(key, []).append(node)
+                if not self.header_text and "snapshot information" in summary:
+                    self.header_text = node.get_text()
+            for key in pending:
+                self.by_title[key] = node
+            pending = []
+
+    def full_text(self) -> str:
+        return self.soup.get_text()
+
+    def records(self, key: str) -> List[Dict[str, Any]]:
+        """Rows of the first non-empty table for a section: by summary, else the table after its title."""
+        for tbl in self.by_summary.get(key, []):
+            records = _table_records(tbl)
+            if records:
+                return records
+        tbl = self.by_title.get(key)
+        return _table_records(tbl) if tbl is not None else []
+
+_FRAG_TAG_RE = re.compile(rb"<h([1-4])\b[^>]*>|<table\b[^>]*>", re.I)
+_FRAG_SUMMARY_RE = re.compile(rb"""\bsummary\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+_FRAG_TABLE_EDGE_RE = re.compile(rb"<table\b|</table\s*>", re.I)
+_FRAG_HEADING_END_RES = {n: re.compile(rb"</h%s\s*>" % n, re.I) for n in (b"1", b"2", b"3", b"4")}
+_FRAG_MARKUP_RE = re.compile(r"<[^>]*>")
+
+def _frag_text(fragment: str, sep: str = "", strip: bool = False) -> str:
+    """Text of an HTML fragment, like Tag.get_text(sep, strip=strip)."""
+    parts = (_html.unescape(p) for p in _FRAG_MARKUP_RE.split(fragment))
+    if strip:
+        return sep.join(p.strip() for p in parts if p.strip())
+    return sep.join(parts)
+
+class AwrFragmentIndex(AwrIndex):
+    """
+    Same lookups as AwrIndex, built from the raw report bytes without a DOM.
 
-def get_db_time_from_html(soup: BeautifulSoup) -> float:
+    Headings and <table> start tags are found with one bytes regex pass; only the
+    byte ranges of the tables we index are decoded, so the report is never handed
+    to BeautifulSoup as a whole.
+    """
+
+    def __init__(self, raw: bytes):
+        self.soup = None
+        self.raw = raw
+        self.by_summary: Dict[str, List[str]] = {}
+        self.by_title: Dict[str, str] = {}
+        self.header_text = ""
+        pending: List[str] = []
+        for m in _FRAG_TAG_RE.finditer(raw):
+            if m.group(1):
+                em = _FRAG_HEADING_END_RES[m.group(1)].search(raw, m.end())
+                if em is None:
+                    continue
+                end = em.start()
+                title = _frag_text(raw[m.end():end].decode("utf-8", "ignore"), " ", strip=True)
+                pending = [key for key, (_, titles) in _SECTIONS.items()
+                           if key not in self.by_title and _contains_any(title, titles)]
+                continue
+            start, end = m.start(), self._table_end(m.end())
+            fragment: Optional[str] = None
+            sm = _FRAG_SUMMARY_RE.search(m.group(0))
+            summary = _html.unescape(next(g for g in sm.groups() if g is not None).decode("utf-8", "ignore")).lower() if sm else ""
+            if summary:
+                for key, res in _SECTION_RES.items():
+                    if any(r.search(summary) for r in res):
+                        fragment = fragment or raw[start:end].decode("utf-8", "ignore")
+                        self.by_summary.setdefault(key, []).append(fragment)
+                if not self.header_text and "snapshot information" in summary:
+                    fragment = fragment or raw[start:end].decode("utf-8", "ignore")
+                    self.header_text = _frag_text(fragment)
+            if pending:
+                fragment = fragment or raw[start:end].decode("utf-8", "ignore")
+                for key in pending:
+                    self.by_title[key] = fragment
+                pending = []
+
+    def _table_end(self, pos: int) -> int:
+        """Offset just past the </table> closing the table opened before `pos`."""
+        depth = 1
+        for m in _FRAG_TABLE_EDGE_RE.finditer(self.raw, pos):
+            depth += -1 if m.group(0)[1:2] == b"/" else 1
+            if depth == 0:
+                return m.end()
+        return len(self.raw)
+
+    def full_text(self) -> str:
+        return _frag_text(self.raw.decode("utf-8", "ignore"))
+
+def _as_index(doc: Union[BeautifulSoup, AwrIndex]) -> AwrIndex:
+    return doc if isinstance(doc, AwrIndex) else AwrIndex(doc)
+
+
+def get_db_time_from_html(soup: Union[BeautifulSoup, AwrIndex]) -> float:
     """Extracts DB Time in minutes from the AWR report header."""
-    header_text = soup.get_text()
+    idx = _as_index(soup)
+    header_text = idx.header_text or idx.full_text()
     _DB_TIME_INLINE = re.compile(r"DB\s*Time[:\s]*([\d,\.]+)\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)?", re.I)
     m = _DB_TIME_INLINE.search(header_text)
+    if not m and idx.header_text:
+        # snapshot table without a DB Time row: fall back to the whole document
+        m = _DB_TIME_INLINE.search(idx.full_text())
     if m:
         val = float(str(m.group(1)).replace(",", ""))
         unit = (m.group(2) or "").lower()
@@ -110,27 +323,58 @@ def get_db_time_from_html(soup: BeautifulSoup) -> float:
         return val
     return 0.0
 
+# Report header probe: the snapshot table sits in the first few KB of every AWR
+_PROBE_BYTES = 512 * 1024
+_PROBE_MINUTES_RE = r"([\d,\.]+)\s*\(?\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)?\b"
+_PROBE_DB_TIME_RE = re.compile(r"DB\s*Time\s*:\s*" + _PROBE_MINUTES_RE, re.I)
+_PROBE_ELAPSED_RE = re.compile(r"Elapsed\s*:\s*" + _PROBE_MINUTES_RE, re.I)
+_PROBE_BEGIN_RE = re.compile(r"Begin\s*Snap\s*:\s*(\d+)", re.I)
+_PROBE_END_RE = re.compile(r"End\s*Snap\s*:\s*(\d+)", re.I)
+
+def _minutes(m: Optional[re.Match]) -> Optional[float]:
+    if not m:
+        return None
+    try:
+        val = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    unit = (m.group(2) or "").lower()
+    if unit.startswith("h"): return val * 60.0
+    if unit.startswith("s"): return val / 60.0
+    return val
+
+def probe_header(html_path: Path, max_bytes: int = _PROBE_BYTES) -> Dict[str, Any]:
+    """
+    Read only the first `max_bytes` of a report and pick the header summary:
+    DB Time and Elapsed (minutes) and the begin/end snapshot ids. Missing
+    values are None; nothing beyond the header region is read or parsed.
+    """
+    out: Dict[str, Any] = {"db_time_min": None, "elapsed_min": None, "begin_snap": None, "end_snap": None}
+    try:
+        with html_path.open("rb") as fp:
+            head = fp.read(max_bytes)
+    except OSError:
+        return out
+    text = _frag_text(head.decode("utf-8", "ignore"), " ")
+    out["db_time_min"] = _minutes(_PROBE_DB_TIME_RE.search(text))
+    out["elapsed_min"] = _minutes(_PROBE_ELAPSED_RE.search(text))
+    for key, rx in (("begin_snap", _PROBE_BEGIN_RE), ("end_snap", _PROBE_END_RE)):
+        m = rx.search(text)
+        out[key] = int(m.group(1)) if m else None
+    return out
+
 # ---------- section parsers ----------
 
-def parse_instance_efficiency(soup: BeautifulSoup) -> Dict[str, Optional[float]]:
-    # Prefer table summary (reliable in your file)
-    df = _find_table_by_summary(
-        soup,
-        [r"instance\s+efficiency\s+percentages"]  # case-insensitive regex
-    )
-    # Fallback: title then next table
-    if df is None:
-        df = _find_table_by_title_then_next_table(
-            soup,
-            ["Instance Efficiency Percentages"]
-        )
-    if df is None or df.empty:
+def parse_instance_efficiency(soup: Union[BeautifulSoup, AwrIndex]) -> Dict[str, Optional[float]]:
+    # Prefer table summary (reliable in your file), fallback: title then next table
+    records = _as_index(soup).records("instance_efficiency")
+    if not records:
         return {}
 
     # This table is usually 2 metrics per row: metric:value metric:value
     out: Dict[str, Optional[float]] = {}
-    for _, row in df.iterrows():
-        values = [str(v).strip() for v in row.values]
+    for row in records:
+        values = [str(v).strip() if v is not None else "" for v in row.values()]
         # walk pairs
         for i in range(0, len(values), 2):
             try:
@@ -146,22 +390,14 @@ def parse_instance_efficiency(soup: BeautifulSoup) -> Dict[str, Optional[float]]
                 out[metric.replace(":", "")] = _num(val)
     return out
 
-def parse_top10_foreground_events(soup: BeautifulSoup) -> List[Dict[str, Any]]:
-    df = _find_table_by_summary(
-        soup,
-        [r"top\s+10.*wait\s+events.*total\s+wait\s+time"]
-    )
-    if df is None:
-        df = _find_table_by_title_then_next_table(
-            soup, ["Top 10 Foreground Events by Total Wait Time"]
-        )
-    if df is None or df.empty:
+def parse_top10_foreground_events(soup: Union[BeautifulSoup, AwrIndex]) -> List[Dict[str, Any]]:
+    records = _as_index(soup).records("top10_events")
+    if not records:
         return []
 
-    df = _clean_cols(df)
     # rename common columns
     ren = {}
-    for c in df.columns:
+    for c in records[0]:
         lc = c.lower()
         if "event" in lc and "class" not in lc:
             ren[c] = "event"
@@ -175,165 +411,113 @@ def parse_top10_foreground_events(soup: BeautifulSoup) -> List[Dict[str, Any]]:
             ren[c] = "pct_db_time"
         elif "wait class" in lc:
             ren[c] = "wait_class"
-    df = df.rename(columns=ren)
-    keep = [c for c in ["event", "waits", "total_wait_time_s", "avg_wait", "pct_db_time", "wait_class"] if c in df.columns]
-
-    # numeric conversions
-    for c in ["waits", "total_wait_time_s", "pct_db_time"]:
-        if c in df.columns:
-            df[c] = df[c].map(_num)
+    source = {}  # new name -> original column (first one wins)
+    for c, name in ren.items():
+        source.setdefault(name, c)
+    keep = [c for c in ["event", "waits", "total_wait_time_s", "avg_wait", "pct_db_time", "wait_class"] if c in source]
+
+    out = []
+    for row in records[:10]:
+        rec = {c: row.get(source[c]) for c in keep}
+        # numeric conversions
+        for c in ["waits", "total_wait_time_s", "pct_db_time"]:
+            if c in rec:
+                rec[c] = _num(rec[c])
+        out.append(rec)
+    return out
 
-    return df[keep].head(10).to_dict(orient="records")
+# "SQL ordered by ..." tables: section key -> (analyze() key, columns kept, metric columns (one required))
+_SQL_SECTIONS: Dict[str, Tuple[str, List[str], List[str]]] = {
+    "sql_elapsed": ("SQL ordered by Elapsed Time",
+                    ["sql_id", "elapsed_time_s", "executions", "elapsed_per_exec_s", "pct_total_elapsed"],
+                    ["elapsed_time_s", "elapsed_per_exec_s"]),
+}
+
+def _sql_column(col: str) -> Optional[str]:
+    """Normalized name for a 'SQL ordered by ...' column, None for columns we drop."""
+    lc = re.sub(r"\s+", " ", str(col)).strip().lower()
+    if "sql id" in lc or lc == "sqlid" or "sql_id" in lc:
+        return "sql_id"
+    if ("elapsed time" in lc and "/exec" in lc) or "elapsed time per exec" in lc:
+        return "elapsed_per_exec_s"
+    if ("elapsed time" in lc) and ("(s" in lc or "sec" in lc or "time (s)" in lc):
+        return "elapsed_time_s"
+    if "executions" in lc:
+        return "executions"
+    if "%total" in lc and "elapsed" in lc:
+        return "pct_total_elapsed"
+    return None
 
-def parse_sql_ordered_by_elapsed(soup: BeautifulSoup) -> List[Dict[str, Any]]:
-    """
-    Find and return only the 'SQL ordered by Elapsed Time' rows (top 10).
-    Strategy: read all tables -> pick those that look like the Elapsed Time SQL table
-    (must contain SQL ID + Elapsed Time columns), handle duplicate headers, clean numbers.
-    """
-    from io import StringIO
+def _parse_sql_section(idx: AwrIndex, key: str) -> List[Dict[str, Any]]:
+    _, keep_cols, metrics = _SQL_SECTIONS[key]
+    records = idx.records(key)
+    if not records:
+        return []
 
-    # Read ALL tables once (avoids title/anchor brittleness)
-    try:
-        dfs = pd.read_html(StringIO(str(soup)), flavor="lxml")
-    except Exception:
-        try:
-            dfs = pd.read_html(StringIO(str(soup)))
-        except Exception:
-            return []
+    # Normalize/rename columns we care about (first column wins on a clash)
+    source: Dict[str, str] = {}  # new name -> original column
+    for c in records[0]:
+        name = _sql_column(c)
+        if name in keep_cols:
+            source.setdefault(name, c)
 
-    def _has_anycell(df: pd.DataFrame, needles: List[str]) -> bool:
-        # headers
-        for col in df.columns:
-            if _contains_any(str(col), needles):
-                return True
-        # a few stringy cells
-        for _, row in df.head(20).iterrows():
-            for v in row.values:
-                if isinstance(v, str) and _contains_any(v, needles):
-                    return True
-        return False
-
-    wanted = []
-    for df in dfs:
-        df = _clean_cols(df)
-        # quick filter: must look like the "Elapsed Time" SQL table
-        if not _has_anycell(df, ["sql id", "sqlid", "sql_id"]):
-            continue
-        if not _has_anycell(df, ["elapsed time"]):  # focus ONLY elapsed-time table
-            continue
+    # Require sql_id and the section's metric
+    if "sql_id" not in source or not any(c in source for c in metrics):
+        return []
 
-        # De-dup duplicate column names so pandas doesn't drop them
-        seen, new_cols = {}, []
-        for c in df.columns:
-            c = str(c).strip()
-            if c in seen:
-                seen[c] += 1
-                new_cols.append(f"{c}.{seen[c]}")
-            else:
-                seen[c] = 0
-                new_cols.append(c)
-        cdf = df.copy()
-        cdf.columns = new_cols
-
-        # Normalize/rename columns we care about
-        rename_map = {}
-        for c in cdf.columns:
-            lc = re.sub(r"\s+", " ", str(c)).strip().lower()
-            if "sql id" in lc or lc == "sqlid" or "sql_id" in lc:
-                rename_map[c] = "sql_id"
-            elif ("elapsed time" in lc and "/exec" in lc) or "elapsed time per exec" in lc:
-                rename_map[c] = "elapsed_per_exec_s"
-            elif ("elapsed time" in lc) and ("(s" in lc or "sec" in lc or "time (s)" in lc):
-                rename_map[c] = "elapsed_time_s"
-            elif "executions" in lc:
-                rename_map[c] = "executions"
-            elif "%total" in lc and "elapsed" in lc:
-                rename_map[c] = "pct_total_elapsed"
-
-        cdf = cdf.rename(columns=rename_map)
-
-        # Require sql_id and some elapsed time signal
-        if "sql_id" not in cdf.columns:
-            continue
-        if not (("elapsed_time_s" in cdf.columns) or ("elapsed_per_exec_s" in cdf.columns)):
+    keep = [c for c in keep_cols if c in source]
+    out, seen = [], set()
+    for row in records[:10]:
+        rec = {c: row.get(source[c]) for c in keep}
+        # drop duplicates by sql_id (keep first)
+        if rec["sql_id"] in seen:
             continue
-
-        keep = [c for c in ["sql_id", "elapsed_time_s", "executions", "elapsed_per_exec_s", "pct_total_elapsed"]
-                if c in cdf.columns]
-        trimmed = cdf[keep].head(10).copy()
-
+        seen.add(rec["sql_id"])
         # Numeric cleanup
-        for col in trimmed.columns:
+        for col in keep:
             if col != "sql_id":
-                trimmed[col] = trimmed[col].map(_num)
-
-        wanted.append(trimmed)
-
-    if not wanted:
-        return []
-
-    out = pd.concat(wanted, ignore_index=True)
-    # drop duplicates by sql_id (keep first)
-    if "sql_id" in out.columns:
-        out = out.drop_duplicates(subset=["sql_id"], keep="first")
+                rec[col] = _num(rec[col])
+        out.append(rec)
+    return out
 
-    return out.to_dict(orient="records")
+def parse_sql_ordered_by_elapsed(soup: Union[BeautifulSoup, AwrIndex]) -> List[Dict[str, Any]]:
+    """
+    Find and return only the 'SQL ordered by Elapsed Time' rows (top 10).
+    The table is located like every other section (summary, else title) and is
+    the only SQL table turned into rows; numbers are cleaned.
+    """
+    return _parse_sql_section(_as_index(soup), "sql_elapsed")
 
 
-def parse_pga_memory_advisory(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+def parse_pga_memory_advisory(soup: Union[BeautifulSoup, AwrIndex]) -> List[Dict[str, Any]]:
     """
     Return the FULL 'PGA Memory Advisory' / 'PGA Aggregate Target Advisory' table.
     Keeps every column exactly as shown in the AWR (after header cleaning + de-dupe).
     """
-    df = _find_table_by_summary(soup, [r"pga.*advisory"])
-    if df is None:
-        df = _find_table_by_title_then_next_table(
-            soup, ["PGA Memory Advisory", "PGA Aggregate Target Advisory"]
-        )
-    if df is None or df.empty:
-        return []
-    df = _clean_cols(df)
+    records = _as_index(soup).records("pga_advisory")
     # Return every column untouched (numeric conversion skipped to preserve raw values/units)
-    return df.to_dict(orient="records")
+    return records
 
 
-def parse_sga_target_advisory(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+def parse_sga_target_advisory(soup: Union[BeautifulSoup, AwrIndex]) -> List[Dict[str, Any]]:
     """
     Return the FULL 'SGA Target Advisory' table.
     Keeps every column exactly as shown in the AWR (after header cleaning + de-dupe).
     """
-    df = _find_table_by_summary(soup, [r"sga.*target.*advisory"])
-    if df is None:
-        df = _find_table_by_title_then_next_table(soup, ["SGA Target Advisory"])
-    if df is None or df.empty:
-        return []
-    df = _clean_cols(df)
+    records = _as_index(soup).records("sga_advisory")
     # Return every column untouched (numeric conversion skipped to preserve raw values/units)
-    return df.to_dict(orient="records")
+    return records
 
-def parse_instance_thread_activity(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+def parse_instance_thread_activity(soup: Union[BeautifulSoup, AwrIndex]) -> List[Dict[str, Any]]:
     """
     Parse 'Instance Activity Stats - Thread Activity' (Statistic | Total | per Hour).
     Returns the full table as a list of dicts.
     """
-    # Prefer the table's summary attribute (most reliable)
-    df = _find_table_by_summary(
-        soup,
-        [r"thread\s+activity\s+stats"]  # matches: "This table displays thread activity stats..."
-    )
-    # Fallback: match the section title then grab the next table
-    if df is None:
-        df = _find_table_by_title_then_next_table(
-            soup, ["Instance Activity Stats - Thread Activity"]
-        )
-
-    if df is None or df.empty:
-        return []
-
-    df = _clean_cols(df)  # de-dup/normalize headers
-    # Keep columns as-is so you see exactly what AWR shows
-    return df.to_dict(orient="records")
+    # Prefer the table's summary attribute ("This table displays thread activity stats..."),
+    # fallback: the section title then the next table
+    records = _as_index(soup).records("thread_activity")
+    # Keep columns as-is (headers de-duped) so you see exactly what AWR shows
+    return records
 
 
 def analyze_instance_efficiency(data: Dict[str, Optional[float]]) -> str:
@@ -410,119 +594,97 @@ def analyze_sql_ordered_by_elapsed(data: List[Dict[str, Any]]) -> str:
     return "✅ Top Running SQL: There is no concerning running SQL with significant running time or wait"
 
 
-def analyze_sga_advisory(data: List[Dict[str, Any]]) -> str:
-    """
-    Analyzes SGA Target Advisory data to recommend size changes.
-
-    A recommendation is triggered if either of these conditions are met for a future size:
-    1. Original Logic: The relative improvement in physical reads is significant compared to the SGA size increase.
-    2. New Logic: A small SGA increase (<1GB) results in a very large drop (>10M) in physical reads.
-    """
-    current_row = None
-    target_row = None
+# ---- SGA / PGA advisories: typed columns + rules that work on arrays or scalars ----
+_SGA_COLS = ("SGA Size Factor", "SGA Target Size (M)", "Est Physical Reads")
+_PGA_COLS = ("Size Factr", "PGA Target Est (MB)", "Estd Extra W/A MB Read/ Written to Disk")
+_NAN = float("nan")
 
-    # First, find the current configuration row (Size Factor = 1.0)
-    for row in data:
-        if _num(row.get('SGA Size Factor')) == 1.00:
-            current_row = row
-            break
-    
-    if not current_row:
-        return "✅ SGA Advisor: Appropriate DB time and physical read"
+def _advisory_columns(data: List[Dict[str, Any]], cols: Tuple[str, ...]) -> List[Any]:
+    """One float column per name (NaN = missing), each cell parsed with _num() once."""
+    out = []
+    for c in cols:
+        vals = [_num(r.get(c)) for r in data]
+        vals = [_NAN if v is None else v for v in vals]
+        out.append(np.array(vals, dtype=float) if np is not None else vals)
+    return out
 
-    # Now, iterate through potential target rows (size factor > 1.0) to find the first suitable recommendation
-    for row in data:
-        size_factor = _num(row.get('SGA Size Factor'))
-        
-        # We only care about rows representing an increase in size
-        if size_factor is None or size_factor <= 1.00:
-            continue
+def _first_match(rule, n: int, *cols) -> Optional[int]:
+    """Index of the first row where rule(*cols) holds: one array evaluation with numpy, else row by row."""
+    if np is not None:
+        hits = np.flatnonzero(rule(*cols))
+        return int(hits[0]) if hits.size else None
+    for i in range(n):
+        if rule(*(c[i] if isinstance(c, list) else c for c in cols)):
+            return i
+    return None
 
-        # Extract numeric values needed for both conditions
-        current_physical_reads = _num(current_row.get('Est Physical Reads'))
-        est_physical_reads = _num(row.get('Est Physical Reads'))
-        current_sga_size = _num(current_row.get('SGA Target Size (M)'))
-        target_sga_size = _num(row.get('SGA Target Size (M)'))
+def _sga_rule(size_factor, target_size, est_reads, current_size, current_reads):
+    # NaN (missing) cells fail every comparison, i.e. the row is skipped
+    valid = (target_size == target_size) & (est_reads == est_reads) & (current_size == current_size)
+    reads_decrease = current_reads - est_reads
+    # 1) reads improve by at least 1.5x the relative size increase
+    cond1 = (reads_decrease / current_reads >= 1.5 * (size_factor - 1.0)) if current_reads > 0 else False
+    # 2) < 1 GB more SGA drops reads by > 10M
+    cond2 = (target_size - current_size < 1024) & (reads_decrease > 10_000_000)
+    return valid & (size_factor > 1.0) & (cond1 | cond2)
+
+def _pga_rule(size_factor, extra_mb, current_extra_mb):
+    improvement = current_extra_mb * (1.5 * (size_factor - 1.0))
+    return (size_factor > 1.0) & (improvement > 0) & (current_extra_mb - extra_mb >= improvement)
+
+def _running_current(size_factor: Any, values: Any) -> Any:
+    """Per row: `values` of the latest earlier Size Factor 1.0 row (NaN before the first one)."""
+    if np is not None:
+        pos = np.where(size_factor == 1.0, np.arange(len(size_factor)), -1)
+        pos = np.maximum.accumulate(pos) if len(pos) else pos
+        return np.where(pos >= 0, values[np.maximum(pos, 0)], _NAN)
+    out, cur = [], _NAN
+    for sf, v in zip(size_factor, values):
+        if sf == 1.0:
+            cur = v
+        out.append(cur)
+    return out
 
-        # If data is missing for a row, skip it
-        if any(v is None for v in [current_physical_reads, est_physical_reads, current_sga_size, target_sga_size]):
-            continue
+def analyze_sga_advisory(data: List[Dict[str, Any]]) -> str:
+    """
+    Analyzes SGA Target Advisory data to recommend size changes.
 
-        # --- Condition 1: Original proportional improvement logic ---
-        condition1_met = False
-        # Avoid division by zero if there are no physical reads currently
-        if current_physical_reads > 0:
-            physical_reads_improvement_pct = (current_physical_reads - est_physical_reads) / current_physical_reads
-            required_improvement_pct = 1.5 * (size_factor - 1.0)
-            if physical_reads_improvement_pct >= required_improvement_pct:
-                condition1_met = True
-        
-        # --- Condition 2: New logic for large gains from small increases ---
-        sga_increase_mb = target_sga_size - current_sga_size
-        reads_decrease = current_physical_reads - est_physical_reads
-        
-        condition2_met = (sga_increase_mb < 1024 and reads_decrease > 10_000_000)
-
-        # If either condition is met, we've found our recommendation.
-        # We break to select the smallest SGA increase that satisfies the criteria.
-        if condition1_met or condition2_met:
-            target_row = row
-            break
-    
-    # If a target row was identified, format the recommendation string
-    if target_row:
-        # Re-read values to ensure they are the correct ones from the final target_row
-        current_sga_size = _num(current_row.get('SGA Target Size (M)'))
-        target_sga_size = _num(target_row.get('SGA Target Size (M)'))
-        old_reads = _num(current_row.get('Est Physical Reads'))
-        new_reads = _num(target_row.get('Est Physical Reads'))
-        
-        # Final safety check on numbers before formatting output
-        if any(v is None for v in [current_sga_size, target_sga_size, old_reads, new_reads]):
-             return "✅ SGA Advisor: Appropriate DB time and physical read"
-        
-        read_diff = old_reads - new_reads
-        
-        return (f"❌Recommend to increase size from {current_sga_size:.0f} MB to {target_sga_size:.0f} MB. "
-                f"Physical Reads would decrease by {read_diff:,.0f} from {old_reads:,.0f} to {new_reads:,.0f}")
-    else:
-        # If no suitable target row was found after checking all options
-        return "✅ SGA Advisor: Appropriate DB time and physical read"
+    The smallest size (Size Factor > 1.0) meeting either condition is recommended:
+    1. The relative improvement in physical reads is at least 1.5x the relative SGA size increase.
+    2. A small SGA increase (<1GB) results in a very large drop (>10M) in physical reads.
+    """
+    ok = "✅ SGA Advisor: Appropriate DB time and physical read"
+    size_factor, size, reads = _advisory_columns(data, _SGA_COLS)
+    cur = next((i for i, sf in enumerate(size_factor) if sf == 1.0), None)
+    if cur is None:
+        return ok
+    tgt = _first_match(_sga_rule, len(data), size_factor, size, reads, size[cur], reads[cur])
+    if tgt is None:
+        return ok
+    current_sga_size, target_sga_size = float(size[cur]), float(size[tgt])
+    old_reads, new_reads = float(reads[cur]), float(reads[tgt])
+    read_diff = old_reads - new_reads
+    return (f"❌Recommend to increase size from {current_sga_size:.0f} MB to {target_sga_size:.0f} MB. "
+            f"Physical Reads would decrease by {read_diff:,.0f} from {old_reads:,.0f} to {new_reads:,.0f}")
 
 
 def analyze_pga_advisory(data: List[Dict[str, Any]]) -> str:
-    current_row = None
-    target_row = None
-    for row in data:
-        if _num(row.get('Size Factr')) == 1.00:
-            current_row = row
-        size_factor = _num(row.get('Size Factr'))
-        if size_factor is not None and size_factor > 1.00:
-            est_extra_mb = _num(row.get('Estd Extra W/A MB Read/ Written to Disk'))
-            if current_row and est_extra_mb is not None:
-                current_extra_mb = _num(current_row.get('Estd Extra W/A MB Read/ Written to Disk'))
-                improvement_ratio = 1.5 * (size_factor - 1.0)
-                improvement = current_extra_mb * improvement_ratio
-
-                # Ensure improvement is not zero unless it is valid
-                if improvement > 0 and (current_extra_mb - est_extra_mb) >= improvement:
-                    target_row = row
-                    break
-
-    if not current_row:
-        return "✅ PGA Advisor: Appropriate DB time and physical read"
-        
-    if target_row:
-        current_pga_size = _num(current_row.get('PGA Target Est (MB)'))
-        target_pga_size = _num(target_row.get('PGA Target Est (MB)'))
-        old_rw = _num(current_row.get('Estd Extra W/A MB Read/ Written to Disk'))
-        new_rw = _num(target_row.get('Estd Extra W/A MB Read/ Written to Disk'))
-        rw_diff = old_rw - new_rw
-        
-        return (f"❌ PGA Advisor: Recommend to increase size from {current_pga_size:.0f} MB to {target_pga_size:.0f} MB. "
-                f"Extra W/A MB Read/Written to Disk would decrease by {rw_diff:,.0f} from {old_rw:,.0f} to {new_rw:,.0f}")
-    else:
-        return "✅ PGA Advisor: Appropriate DB time and physical read"
+    """
+    Recommends the first PGA size (Size Factr > 1.0) whose drop in extra W/A MB read/written,
+    compared with the latest Size Factr 1.0 row above it, is at least 1.5x the relative size increase.
+    """
+    ok = "✅ PGA Advisor: Appropriate DB time and physical read"
+    size_factor, size, extra = _advisory_columns(data, _PGA_COLS)
+    current_extra = _running_current(size_factor, extra)
+    tgt = _first_match(_pga_rule, len(data), size_factor, extra, current_extra)
+    if tgt is None:
+        return ok
+    cur = max(i for i in range(tgt) if size_factor[i] == 1.0)
+    current_pga_size, target_pga_size = float(size[cur]), float(size[tgt])
+    old_rw, new_rw = float(extra[cur]), float(extra[tgt])
+    rw_diff = old_rw - new_rw
+    return (f"❌ PGA Advisor: Recommend to increase size from {current_pga_size:.0f} MB to {target_pga_size:.0f} MB. "
+            f"Extra W/A MB Read/Written to Disk would decrease by {rw_diff:,.0f} from {old_rw:,.0f} to {new_rw:,.0f}")
 
 
 
@@ -537,18 +699,70 @@ def analyze_thread_activity(data: List[Dict[str, Any]]) -> str:
 
 # ---------- orchestration & printing ----------
 
-def analyze(html_path: Path) -> Dict[str, Any]:
-    soup = _read_html(html_path)
-    db_time_minutes = get_db_time_from_html(soup)
-    return {
-        "DB Time (minutes)": db_time_minutes,
-        "Instance Efficiency Percentages (Target 100%)": parse_instance_efficiency(soup),
-        "Top 10 Foreground Events by Total Wait Time":   parse_top10_foreground_events(soup),
-        "SQL ordered by Elapsed Time":                   parse_sql_ordered_by_elapsed(soup),
-        "PGA Memory Advisory":                           parse_pga_memory_advisory(soup),
-        "SGA Target Advisory":                           parse_sga_target_advisory(soup),
-        "Instance Activity Stats - Thread Activity":     parse_instance_thread_activity(soup),
-    }
+# analyze() keys, in report order, and the parser that produces each from an AwrIndex
+ANALYZE_SECTIONS: Dict[str, Callable[[AwrIndex], Any]] = {
+    "DB Time (minutes)":                             get_db_time_from_html,
+    "Instance Efficiency Percentages (Target 100%)": parse_instance_efficiency,
+    "Top 10 Foreground Events by Total Wait Time":   parse_top10_foreground_events,
+    "SQL ordered by Elapsed Time":                   parse_sql_ordered_by_elapsed,
+    "PGA Memory Advisory":                           parse_pga_memory_advisory,
+    "SGA Target Advisory":                           parse_sga_target_advisory,
+    "Instance Activity Stats - Thread Activity":     parse_instance_thread_activity,
+}
+
+class AwrAnalysis(Mapping):
+    """
+    analyze() result: a read-only mapping whose sections are parsed on first access.
+
+    The index is dropped once every section has been evaluated; dict(result) forces
+    all of them (e.g. before caching or pickling).
+    """
+
+    def __init__(self, idx: AwrIndex, sections: Iterable[str]):
+        self._idx: Optional[AwrIndex] = idx
+        self._keys = list(sections)
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        if key not in self._keys:
+            raise KeyError(key)
+        value = self._values[key] = ANALYZE_SECTIONS[key](self._idx)
+        if len(self._values) == len(self._keys):
+            self._idx = None
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def evaluated(self) -> List[str]:
+        return [k for k in self._keys if k in self._values]
+
+    def __repr__(self) -> str:
+        return f"<AwrAnalysis {len(self._values)}/{len(self._keys)} sections parsed>"
+
+def analyze(html_path: Path, engine: str = "soup", sections: Optional[Iterable[str]] = None) -> AwrAnalysis:
+    """
+    engine="soup" parses the whole report with BeautifulSoup; engine="fragments"
+    slices the needed tables out of the raw bytes (AwrFragmentIndex) and parses
+    only those. Both return the same mapping.
+
+    Sections are parsed lazily on first access; `sections` limits the result to
+    those ANALYZE_SECTIONS keys (the default is all of them).
+    """
+    keys = list(ANALYZE_SECTIONS) if sections is None else list(sections)
+    unknown = [k for k in keys if k not in ANALYZE_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown AWR section(s): {', '.join(unknown)}")
+    if engine == "fragments":
+        idx = AwrFragmentIndex(html_path.read_bytes())
+    else:
+        idx = AwrIndex(_read_html(html_path))
+    return AwrAnalysis(idx, keys)
 
 def print_report(data: Dict[str, Any]) -> None:
     print("\n--- AWR Targeted Tables ---\n")
@@ -604,16 +818,44 @@ def print_report(data: Dict[str, Any]) -> None:
     print(sep)
 
 
+def bench_table_lookup(html_path: Path) -> None:
+    """Time section table lookup: one document scan per section vs. a single AwrIndex pass."""
+    import time
+    soup = _read_html(html_path)
+
+    t0 = time.perf_counter()
+    for pats, titles in _SECTIONS.values():
+        if not _find_table_by_summary(soup, pats):
+            _find_table_by_title_then_next_table(soup, titles)
+    soup.get_text()
+    t1 = time.perf_counter()
+    idx = AwrIndex(soup)
+    for key in _SECTIONS:
+        idx.records(key)
+    get_db_time_from_html(idx)
+    t2 = time.perf_counter()
+
+    print(f"{html_path.name}: per-section scans {t1 - t0:.3f}s | AwrIndex {t2 - t1:.3f}s "
+          f"({(t1 - t0) / max(t2 - t1, 1e-9):.1f}x)")
+
+
 def main():
     ap = argparse.ArgumentParser(description="Parse selected tables from an Oracle AWR HTML report.")
     ap.add_argument("html_path", type=str, help="Path to AWR HTML report")
+    ap.add_argument("--engine", choices=["soup", "fragments"], default="soup",
+                    help="soup: full BeautifulSoup DOM (default); fragments: parse only the needed tables")
+    ap.add_argument("--bench", action="store_true", help="Compare table lookup timings instead of printing the report")
     args = ap.parse_args()
 
     path = Path(args.html_path)
     if not path.exists():
         raise SystemExit(f"File not found: {path}")
 
-    data = analyze(path)
+    if args.bench:
+        bench_table_lookup(path)
+        return
+
+    data = analyze(path, engine=args.engine)
     print_report(data)
 
 if __name__ == "__main__":
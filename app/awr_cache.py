@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of parsed AWR results.
+
+Entries are keyed by the SHA-1 of the report content plus awr_analyzer.PARSER_VERSION,
+so a renamed/copied report still hits and a parser change never serves stale data.
+Each entry is one gzip'd JSON file holding the fields stored for that report
+(e.g. "analysis" = analyze() result, "score" = [tier, value] ranking score).
+
+The cache is bounded: on flush() (once per run), least recently used entries (file mtime,
+refreshed on every read) are removed until the total size fits `max_bytes`.
+Content hashes are memoized per (path, size, mtime) so unchanged reports are not
+re-hashed on every run.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try: import awr_analyzer
+except Exception: awr_analyzer = None
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "pm_helper" / "awr"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_HASH_CHUNK = 1024 * 1024
+_STAT_INDEX = "stat_index.json"
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write `data` to `path` via a temp file + rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
+
+class AwrCache:
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.version = str(getattr(awr_analyzer, "PARSER_VERSION", "0"))
+        self._stat_index: Dict[str, str] = {}
+        self._stat_dirty = False
+        try:
+            self._stat_index = json.loads((self.root / _STAT_INDEX).read_text(encoding="utf-8"))
+        except Exception:
+            self._stat_index = {}
+
+    # ---- keys ----
+    def key(self, html_path: Path) -> Optional[str]:
+        """Content hash + parser version for a report, None if it cannot be read."""
+        try:
+            st = html_path.stat()
+        except OSError:
+            return None
+        stat_key = f"{html_path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+        digest = self._stat_index.get(stat_key)
+        if digest is None:
+            h = hashlib.sha1()
+            try:
+                with html_path.open("rb") as f:
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                        h.update(chunk)
+            except OSError:
+                return None
+            digest = h.hexdigest()
+            self._stat_index[stat_key] = digest
+            self._stat_dirty = True
+        return f"{digest}-v{self.version}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def _load(self, key: str) -> Dict[str, Any]:
+        try:
+            with gzip.open(self._entry_path(key), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    # ---- public API ----
+    def get(self, html_path: Path, field: str) -> Optional[Any]:
+        key = self.key(html_path)
+        if key is None:
+            return None
+        entry = self._load(key)
+        if field not in entry:
+            return None
+        try: os.utime(self._entry_path(key))  # LRU: mark as recently used
+        except OSError: pass
+        return entry[field]
+
+    def put(self, html_path: Path, field: str, value: Any) -> None:
+        key = self.key(html_path)
+        if key is None:
+            return
+        entry = self._load(key)
+        entry[field] = value
+        try:
+            payload = gzip.compress(json.dumps(entry, separators=(",", ":"), default=str).encode("utf-8"))
+            atomic_write(self._entry_path(key), payload)
+        except Exception:
+            return
+
+    def flush(self) -> None:
+        """Trim the cache to max_bytes and persist the path/size/mtime -> content hash memo."""
+        self._evict()
+        if not self._stat_dirty:
+            return
+        # keep the memo bounded as well: drop entries for files that no longer exist
+        live = {k: v for k, v in self._stat_index.items() if Path(k.split("|", 1)[0]).exists()}
+        try:
+            atomic_write(self.root / _STAT_INDEX, json.dumps(live).encode("utf-8"))
+            self._stat_dirty = False
+        except Exception:
+            pass
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for p in self.root.glob("*/*.json.gz"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, p in sorted(entries):
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                continue
+            if total <= self.max_bytes:
+                break
@@ -7,17 +7,20 @@ Usage:
   python check_backups.py <log1> [<log2> ...] [--days 7] [--collection "YYYY-MM-DD HH:MM:SS"]
 
 Rules:
-- "Collection date" is taken from the RMAN banner line:
+- "Collection date" is taken from the RMAN banner line in the first HEAD_BYTES:
     "Recovery Manager: Release ... - Production on Wed Sep 10 13:43:10 2025"
   If that is missing, it falls back to the file's modification time.
 - "Latest backup time" is the newest timestamp in format YYYY-MM-DD HH:MM:SS
-  found anywhere in the file (covers Completion Time rows).
+  (covers Completion Time rows). RMAN logs are append-ordered, so the file is read
+  backwards from EOF in TAIL_CHUNK_BYTES chunks and the first chunk holding any
+  timestamp decides; the rest of the file is never read.
 - Prints:
     ✅ file_name  Backup newer than 1 weeks | Latest: YYYY-MM-DD HH:MM:SS | Collection: YYYY-MM-DD HH:MM:SS (source)
     ❌ file_name  Backup is older than 1 weeks | Latest: YYYY-MM-DD HH:MM:SS | Collection: YYYY-MM-DD HH:MM:SS (source)
   (Threshold can be changed via --days, message still says "1 weeks" to match requested format.)
 """
 import argparse
+import os
 import re
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -28,6 +31,13 @@ RMAN_COLLECTION_RE = re.compile(
 )
 # Examples in logs: 2025-07-07 04:20:59
 YMD_HMS_RE = re.compile(r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})')
+YMD_HMS_BYTES_RE = re.compile(rb'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})')
+
+# Start of the log searched for the banner, and the chunk size read backwards from EOF
+HEAD_BYTES = 64 * 1024
+TAIL_CHUNK_BYTES = 1024 * 1024
+# Chunks overlap so a timestamp cut by a chunk boundary is still seen whole
+CHUNK_OVERLAP = 64
 
 def parse_args():
     p = argparse.ArgumentParser(add_help=True)
@@ -49,33 +59,49 @@ def extract_collection_date(text: str, fallback_path: Path):
     # Fallback to file mtime
     return datetime.fromtimestamp(fallback_path.stat().st_mtime), 'mtime'
 
-def extract_latest_backup_time(text: str):
-    # Grab all YYYY-MM-DD HH:MM:SS and take the max.
-    candidates = []
-    for m in YMD_HMS_RE.finditer(text):
-        try:
-            candidates.append(datetime.strptime(m.group(1), '%Y-%m-%d %H:%M:%S'))
-        except ValueError:
-            continue
+def ymd_hms(s):
+    """'YYYY-MM-DD HH:MM:SS' (str or bytes, any whitespace in between) by slicing; None if invalid."""
+    try:
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[-8:-6]), int(s[-5:-3]), int(s[-2:]))
+    except ValueError:
+        return None
+
+def extract_latest_backup_time(text):
+    # Grab all YYYY-MM-DD HH:MM:SS (text or bytes) and take the max.
+    regex = YMD_HMS_BYTES_RE if isinstance(text, bytes) else YMD_HMS_RE
+    candidates = [dt for dt in map(ymd_hms, regex.findall(text)) if dt is not None]
     if not candidates:
         return None
     return max(candidates)
 
+def read_latest_backup_time(fp, size: int):
+    """Newest timestamp of the last chunk of `fp` (read backwards from EOF) that holds any."""
+    hi = size
+    while hi > 0:
+        lo = max(0, hi - TAIL_CHUNK_BYTES)
+        fp.seek(lo)
+        latest = extract_latest_backup_time(fp.read(min(size, hi + CHUNK_OVERLAP) - lo))
+        if latest is not None:
+            return latest
+        hi = lo
+    return None
+
 def fmt(dt: datetime | None) -> str:
     return dt.strftime('%Y-%m-%d %H:%M:%S') if dt else 'N/A'
 
 def check_file(path: Path, threshold_days: int, override_collection: datetime | None) -> str:
     try:
-        raw = path.read_text(errors='ignore')
+        with path.open('rb') as fp:
+            size = os.fstat(fp.fileno()).st_size
+            head = fp.read(HEAD_BYTES).decode('utf-8', errors='ignore')
+            latest_backup_dt = read_latest_backup_time(fp, size)
     except Exception as e:
         return f'❌ {path.name} Failed to read file: {e}'
 
-    collection_dt, source = extract_collection_date(raw, path)
+    collection_dt, source = extract_collection_date(head, path)
     if override_collection is not None:
         collection_dt, source = override_collection, 'override'
 
-    latest_backup_dt = extract_latest_backup_time(raw)
-
     if latest_backup_dt is None:
         return (f'❌ {path.name} No backup timestamps found | Latest: N/A | '
                 f'Collection: {fmt(collection_dt)} ({source})')
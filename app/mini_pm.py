@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-import argparse, io, os, re, sys, zipfile, csv, shutil
+import argparse, io, os, re, sys, zipfile, csv, shutil, heapq
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Any
+import xml.etree.ElementTree as ET
 
 THIS_DIR = Path(__file__).resolve().parent
 if str(THIS_DIR) not in sys.path:
@@ -19,6 +21,23 @@ try: import backup_check
 except Exception: backup_check = None
 try: import alert_log_check_mapped as alert_map  # only for load_mapping()
 except Exception: alert_map = None
+try: import awr_cache
+except Exception: awr_cache = None
+try: import alert_checkpoint
+except Exception: alert_checkpoint = None
+try: import alert_engine
+except Exception: alert_engine = None
+
+# AWR work shared by everything in one run (set by run_all; see AwrSession)
+_awr_session = None
+# Alert log scan checkpoints (set by run_all; None = always scan the whole log)
+_alert_checkpoints = None
+# Processes used to parse alert logs (set by run_all)
+_alert_workers = 1
+# Where compiled ORA code mappings are kept (set by run_all; None = parse the CSV once per process)
+_mapping_cache_dir = None
+# Alert event patterns besides ORA- (set by run_all; None = alert_engine.DEFAULT_MATCHER)
+_alert_matcher = None
 
 # ---------- utils ----------
 def safe_read_text(path: Path) -> str:
@@ -81,43 +100,232 @@ def list_database_dirs(first_level: Path) -> List[Path]:
                 (p / "auto_collection").exists() or (p / "report").exists() or (p / "log").exists()
             )]
 
-# --- AWR scoring (choose best by DB Time) ---
-_DB_TIME_INLINE = re.compile(r"DB\s*Time[:\s]*([\d,\.]+)\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)?", re.I)
-def score_awr(html_path: Path) -> float:
-    txt = safe_read_text(html_path)
-    m = _DB_TIME_INLINE.search(txt)
-    if m:
-        val = float(str(m.group(1)).replace(",",""))
-        unit = (m.group(2) or "").lower()
-        if unit.startswith("h"): return val * 3600.0
-        if unit.startswith("m") and unit != "": return val * 60.0
-        return val
-    if awr_analyzer:
-        try:
+# --- AWR session: per-run memo in front of the on-disk cache ---
+_AWR_NAME_RE = re.compile(r"awrrpt_(\d+)_(\d+)_(\d+)", re.I)
+
+# AWR score tiers, best first (see AwrSession.score)
+SCORE_DB_TIME, SCORE_TOP_WAIT, SCORE_SNAP_ID, SCORE_MTIME = 3, 2, 1, 0
+AwrScore = Tuple[int, float]
+
+class AwrSession:
+    """
+    Run-scoped AWR work: every report is scored, analyzed and rendered at most once per run.
+    Lookups go memo -> on-disk AwrCache (optional) -> awr_analyzer; `stats` counts which
+    layer answered so the end-of-run line can report how many parses were avoided.
+    A fresh parse stays lazy: it is written to the cache only after render() has used it,
+    so reports that are only scored never have their remaining sections parsed.
+    """
+    def __init__(self, cache=None, workers: int = 1):
+        self.cache = cache
+        self.workers = max(1, int(workers or 1))
+        self._scores: Dict[Path, AwrScore] = {}
+        self._data: Dict[Path, Dict[str, Any]] = {}
+        self._text: Dict[Path, str] = {}
+        self._unsaved: set = set()  # parsed this run, not yet written to the cache
+        self._ranked: Dict[Path, Tuple[Optional[int], List[Tuple[AwrScore, Path]]]] = {}
+        self.stats = {"parsed": 0, "memo_hits": 0, "cache_hits": 0, "scored": 0, "score_hits": 0, "render_hits": 0}
+
+    @staticmethod
+    def _key(html_path: Path) -> Path:
+        try: return Path(html_path).resolve()
+        except OSError: return Path(html_path)
+
+    def analyze(self, html_path: Path) -> Dict[str, Any]:
+        """awr_analyzer.analyze(), memoized for the run and through the AWR cache when enabled."""
+        k = self._key(html_path)
+        data = self._data.get(k)
+        if data is not None:
+            self.stats["memo_hits"] += 1
+            return data
+        if self.cache:
+            data = self.cache.get(html_path, "analysis")
+            if data is not None:
+                self.stats["cache_hits"] += 1
+        if data is None:
             data = awr_analyzer.analyze(html_path)
-            rows = data.get("Top 10 Foreground Events by Total Wait Time") or []
-            total = 0.0
-            for r in rows:
-                v = r.get("total_wait_time_s")
-                if isinstance(v,(int,float)): total += v
-            if total > 0: return float(total)
-        except Exception: pass
-    return html_path.stat().st_mtime
-
-# --- Alert log timestamp parsing ---
-_TS_FORMATS = [
-    "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z",
-    "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S",
-    "%a %b %d %H:%M:%S %Y %z", "%a %b %d %H:%M:%S %Y",
-]
-def parse_ts(line: str) -> Optional[datetime]:
-    s = line.strip()
-    if s.endswith("Z"): s = s[:-1] + "+00:00"
-    for fmt in _TS_FORMATS:
-        try: return datetime.strptime(s, fmt)
-        except Exception: continue
-    try: return datetime.fromisoformat(s)
-    except Exception: return None
+            self.stats["parsed"] += 1
+            if self.cache:
+                self._unsaved.add(k)  # cached by render(), once print_report has read every section
+        self._data[k] = data
+        return data
+
+    def render(self, html_path: Path) -> str:
+        """print_report() text for a report (raises like analyze() on failure)."""
+        k = self._key(html_path)
+        text = self._text.get(k)
+        if text is not None:
+            self.stats["render_hits"] += 1
+            return text
+        data = self.analyze(html_path)
+        _stdout = sys.stdout; sys.stdout = io.StringIO()
+        try:
+            awr_analyzer.print_report(data)
+            text = sys.stdout.getvalue()
+        finally:
+            sys.stdout = _stdout
+        if k in self._unsaved:
+            self._unsaved.discard(k)
+            self.cache.put(html_path, "analysis", dict(data))
+        self._text[k] = text
+        return text
+
+    def score(self, html_path: Path) -> AwrScore:
+        """
+        Sort key (tier, value) for picking the busiest AWR; a higher tier always wins:
+          3) DB Time in seconds from the report header (bounded read, awr_analyzer.probe_header)
+          2) total wait of the Top 10 events from a full analyze() (memoized, so reused later)
+          1) end snap id from an awrrpt_<inst>_<begin>_<end>.html name (newest report wins)
+          0) file mtime
+        Only tier 3 is a DB time; the lower tiers just break ties among reports without one.
+        The file name is tried before the full parse: tier 2 is only computed for reports
+        that neither the header nor the name can key.
+        Scores from tiers 1-3 are kept in the AWR cache.
+        """
+        k = self._key(html_path)
+        if k in self._scores:
+            self.stats["score_hits"] += 1
+            return self._scores[k]
+        score = self._cached_score(html_path)
+        if score is None:
+            score = self._store_score(html_path, self._score_uncached(html_path))
+        self.stats["scored"] += 1
+        self._scores[k] = score
+        return score
+
+    def _cached_score(self, html_path: Path) -> Optional[AwrScore]:
+        if self.cache:
+            cached = self.cache.get(html_path, "score")
+            if isinstance(cached, list) and len(cached) == 2:  # older caches hold a bare float
+                return int(cached[0]), float(cached[1])
+        return None
+
+    def _store_score(self, html_path: Path, score: Optional[AwrScore]) -> AwrScore:
+        if score is None:
+            return SCORE_MTIME, html_path.stat().st_mtime
+        if self.cache:
+            self.cache.put(html_path, "score", list(score))
+        return score
+
+    def _score_uncached(self, html_path: Path) -> Optional[AwrScore]:
+        if awr_analyzer:
+            head = awr_analyzer.probe_header(html_path)
+            if head.get("db_time_min"):
+                return SCORE_DB_TIME, head["db_time_min"] * 60.0
+        m = _AWR_NAME_RE.search(html_path.name)
+        if m:
+            return SCORE_SNAP_ID, float(m.group(3))
+        if awr_analyzer:
+            try:
+                data = self.analyze(html_path)
+                rows = data.get("Top 10 Foreground Events by Total Wait Time") or []
+                total = 0.0
+                for r in rows:
+                    v = r.get("total_wait_time_s")
+                    if isinstance(v,(int,float)): total += v
+                if total > 0: return SCORE_TOP_WAIT, float(total)
+            except Exception: pass
+        return None
+
+    def ranked(self, report_dir: Path, top_k: Optional[int] = None) -> List[Tuple[AwrScore, Path]]:
+        """
+        *.html in report_dir as (score, path), best first, ties broken by file name so the
+        order is the same whatever the worker count. With top_k only the k best are kept
+        (bounded heap; a report that falls out also drops any analyze() result its scoring
+        produced). Scoring fans out over a process pool when workers > 1.
+        Computed once per folder (a later call asking for more than was kept rescans).
+        """
+        k = self._key(report_dir)
+        hit = self._ranked.get(k)
+        if hit and (hit[0] is None or (top_k is not None and top_k <= hit[0])):
+            return hit[1][:top_k] if top_k is not None else hit[1]
+        htmls = sorted(report_dir.glob("*.html"), key=lambda h: h.name)
+        if top_k is None:
+            ranked = sorted(self._iter_scores(htmls), key=lambda x: x[0], reverse=True)
+        else:
+            heap: List[Tuple[AwrScore, int, Path]] = []  # min-heap; -i makes earlier names win ties
+            for i, (score, h) in enumerate(self._iter_scores(htmls)):
+                if top_k <= 0:
+                    loser = h
+                elif len(heap) < top_k:
+                    heapq.heappush(heap, (score, -i, h)); continue
+                else:
+                    loser = heapq.heappushpop(heap, (score, -i, h))[2]
+                self._data.pop(self._key(loser), None)  # fallback-scored losers: never rendered
+                self._unsaved.discard(self._key(loser))
+            ranked = [(score, h) for score, _, h in sorted(heap, reverse=True)]
+        for score, h in ranked:
+            self._scores.setdefault(self._key(h), score)
+        self._ranked[k] = (top_k, ranked)
+        return ranked
+
+    def _iter_scores(self, htmls: List[Path]):
+        """Yield (score, path) in the order of htmls; uncached scores are computed in workers."""
+        cached: Dict[Path, AwrScore] = {}
+        pending = []
+        for h in htmls:
+            if self._key(h) in self._scores:
+                continue
+            c = self._cached_score(h)
+            if c is not None:
+                cached[h] = c
+            else:
+                pending.append(h)
+        computed = self._pool_scores(pending)
+        for h in htmls:
+            kh = self._key(h)
+            if kh in self._scores:
+                self.stats["score_hits"] += 1
+                yield self._scores[kh], h
+                continue
+            score = cached.pop(h, None)
+            if score is None:
+                score = self._store_score(h, next(computed))
+            self.stats["scored"] += 1
+            yield score, h
+
+    def _pool_scores(self, pending: List[Path]):
+        """Yield _score_uncached() for each of pending, in order, lazily; a pool does the work when workers > 1."""
+        done = 0
+        if self.workers > 1 and len(pending) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                    chunk = max(1, len(pending) // (self.workers * 4))
+                    for score in pool.map(_score_awr_worker, pending, chunksize=chunk):
+                        done += 1
+                        yield score
+            except Exception as e:
+                print(f"⚠️ Parallel AWR scoring failed ({e}); scoring serially")
+        for h in pending[done:]:
+            yield self._score_uncached(h)
+
+    def summary(self) -> str:
+        st = self.stats
+        avoided = st["memo_hits"] + st["cache_hits"]
+        return (f"AWR session: {st['parsed']} parsed, {avoided} parses avoided "
+                f"({st['memo_hits']} in-run, {st['cache_hits']} from cache), "
+                f"{st['scored']} scored ({st['score_hits']} rescans avoided), {st['render_hits']} renders reused")
+
+def _score_awr_worker(html_path: Path) -> Optional[AwrScore]:
+    """
+    Process-pool entry point: score one report without cache (the parent owns it).
+    Only the score comes back; a winner that needed a full parse is analyzed again when rendered.
+    """
+    try:
+        return AwrSession()._score_uncached(html_path)
+    except Exception:
+        return None
+
+def _session() -> AwrSession:
+    global _awr_session
+    if _awr_session is None:
+        _awr_session = AwrSession()
+    return _awr_session
+
+def _analyze_awr(html_path: Path) -> Dict[str, Any]:
+    return _session().analyze(html_path)
+
+def score_awr(html_path: Path) -> AwrScore:
+    return _session().score(html_path)
 
 # ---------- Severity engine (Severity 1–4) ----------
 SEV_LABEL = {
@@ -137,8 +345,10 @@ def _desc_lines_from(text: str, max_lines: int=12) -> str:
 # --- Normalize DB folder name for node pairing (strip a single node suffix like -1/_2/NODE1) ---
 def _normalize_db_name(name: str) -> str:
     s = name.strip()
-    # remove a single trailing node suffix variations: "-1", "_2", "node1", "node2", "01", "02"
-    s = re.sub(r'(?i)(?:[\-_ ]?(?:node)?[\-_ ]?(?:0)?[12])$', '', s)
+    # remove a single trailing node suffix: any node number after a separator or "node"
+    # ("-3", "_04", "_node3", "NODE5"), but a bare digit only for 1/2 ("CDB1", "02"), so that
+    # CDB3/CDB4 or ORCL19 keep their names
+    s = re.sub(r'(?i)(?:[\-_ ](?:node)?[\-_ ]?0?[1-9]|node[\-_ ]?0?[1-9]|0?[12])$', '', s)
     return s.upper()
 
 def severity_config(text: str) -> int:
@@ -178,6 +388,9 @@ def severity_tablespace(item_text: str) -> int:
         return 3
     return 3
 
+_ALERT_S1 = ("ORA-00600","ORA-07445")
+_ALERT_S2 = ("ORA-04031","ORA-04030","ORA-01652","ORA-01654","ORA-01628","ORA-01578","ORA-01157","ORA-01110")
+
 def severity_alert(alert_csv_text: str) -> int:
     s = alert_csv_text.strip()
     if not s: return 4
@@ -185,12 +398,32 @@ def severity_alert(alert_csv_text: str) -> int:
     rows = [ln for ln in s.splitlines() if ln.strip()]
     if len(rows) <= 1: return 4
     text = "\n".join(rows[1:])
-    S1 = ("ORA-00600","ORA-07445")
-    if any(code in text for code in S1): return 1
-    S2 = ("ORA-04031","ORA-04030","ORA-01652","ORA-01654","ORA-01628","ORA-01578","ORA-01157","ORA-01110")
-    if any(code in text for code in S2): return 2
+    if any(code in text for code in _ALERT_S1): return 1
+    if any(code in text for code in _ALERT_S2): return 2
+    return 3
+
+def severity_alert_codes(codes) -> int:
+    """severity_alert() for a set of ORA codes (e.g. one window of AlertBuckets)."""
+    codes = set(codes)
+    if not codes: return 4
+    if codes.intersection(_ALERT_S1): return 1
+    if codes.intersection(_ALERT_S2): return 2
     return 3
 
+# Extra windows (days) reported from the alert day buckets next to --alert-days
+_ALERT_TREND_DAYS = (7, 30)
+_ALERT_TREND_WEEKS = 13
+
+def alert_trend_text(buckets, alert_days: int) -> str:
+    """One line: ORA count and severity per window (whole local days) plus a weekly sparkline."""
+    windows = sorted({d for d in _ALERT_TREND_DAYS if d < alert_days} | {alert_days})
+    parts = []
+    for days in windows:
+        agg = buckets.last_days(days)
+        parts.append(f"{days}d: {sum(m['count'] for m in agg.values())} ORA, {_sev_label(severity_alert_codes(agg))}")
+    weeks = max(1, min(_ALERT_TREND_WEEKS, (alert_days + 6) // 7))
+    return "Trend " + "; ".join(parts) + f"; weekly {buckets.sparkline(buckets.weekly(weeks))}"
+
 def severity_backup(text: str) -> int:
     lines = [ln for ln in text.splitlines() if ln.strip()]
     if not lines: return 4
@@ -227,16 +460,10 @@ def run_awr(db_dir: Path, out_dir: Path, copy_selected_to: Optional[Path]=None)
     report_dir = db_dir / "report"; buf = io.StringIO()
     if not report_dir.exists():
         msg = "⚠️ Skipped AWR (no report folder)\n"; write_file(out_dir / "awr_analysis.txt", msg); return None, msg
-    htmls = list(report_dir.glob("*.html"))
-    if not htmls:
-        msg = "⚠️ Skipped AWR (no *.html)\n"; write_file(out_dir / "awr_analysis.txt", msg); return None, msg
-
     # Score all AWRs and sort by score descending
-    scored_awrs = []
-    for h in htmls:
-        score_seconds = score_awr(h)
-        scored_awrs.append((score_seconds, h))
-    scored_awrs.sort(key=lambda x: x[0], reverse=True)
+    scored_awrs = _session().ranked(report_dir, top_k=3)
+    if not scored_awrs:
+        msg = "⚠️ Skipped AWR (no *.html)\n"; write_file(out_dir / "awr_analysis.txt", msg); return None, msg
 
     # Get the top 3 reports or fewer if less than 3 exist
     top_3_awrs = scored_awrs[:3]
@@ -246,9 +473,10 @@ def run_awr(db_dir: Path, out_dir: Path, copy_selected_to: Optional[Path]=None)
     if copy_selected_to is not None:
         try:
             copy_selected_to.mkdir(parents=True, exist_ok=True)
-            for i, (score_seconds, awr_path) in enumerate(top_3_awrs):
-                score_minutes = int(score_seconds / 60)
-                new_name = f"(top{i+1}_{score_minutes}){awr_path.name}"
+            for i, ((tier, value), awr_path) in enumerate(top_3_awrs):
+                # minutes only when the score really is DB time
+                tag = f"top{i+1}_{int(value / 60)}" if tier == SCORE_DB_TIME else f"top{i+1}"
+                new_name = f"({tag}){awr_path.name}"
                 dest = copy_selected_to / new_name
                 shutil.copy2(awr_path, dest)
                 buf.write(f"Copied AWR (top {i+1}) to: {dest}\n")
@@ -262,14 +490,8 @@ def run_awr(db_dir: Path, out_dir: Path, copy_selected_to: Optional[Path]=None)
         buf.write(f"Selected AWR for analysis: {best.name}\n\n")
         if awr_analyzer:
             try:
-                data = awr_analyzer.analyze(best)
-                _stdout = sys.stdout; sys.stdout = io.StringIO()
-                awr_analyzer.print_report(data)
-                rendered = sys.stdout.getvalue(); sys.stdout = _stdout
-                buf.write(rendered)
+                buf.write(_session().render(best))
             except Exception as e:
-                try: sys.stdout = _stdout
-                except Exception: pass
                 buf.write(f"❌ AWR analyze failed: {e}\n")
         else:
             buf.write("❌ awr_analyzer not importable\n")
@@ -284,27 +506,16 @@ def _select_best_awr(db_dir: Path):
     report_dir = db_dir / "report"
     if not report_dir.exists():
         return None
-    htmls = list(report_dir.glob("*.html"))
-    if not htmls:
-        return None
-    scored = [(score_awr(h), h) for h in htmls]
-    scored.sort(key=lambda x: x[0], reverse=True)
+    scored = _session().ranked(report_dir, top_k=1)
     return scored[0][1] if scored else None
 
 def _render_awr_text(html_path: Path) -> str:
     """Use awr_analyzer to analyze and render text like run_awr."""
-    import io, sys
     if not (awr_analyzer and html_path and html_path.exists()):
         return ""
     try:
-        data = awr_analyzer.analyze(html_path)
-        _stdout = sys.stdout; sys.stdout = io.StringIO()
-        awr_analyzer.print_report(data)
-        rendered = sys.stdout.getvalue(); sys.stdout = _stdout
-        return rendered
+        return _session().render(html_path)
     except Exception:
-        try: sys.stdout = _stdout
-        except Exception: pass
         return ""
 
 # Match lines like:
@@ -514,258 +725,273 @@ def run_tablespace_checks(db_dir: Path, out_dir: Path) -> Tuple[str, List[Tuple[
     write_file(out_dir / "tablespace_report.txt", full_text)
     return full_text, per_file
 
-def run_alert_log(db_dir: Path, out_dir: Path, map_csv: Optional[Path], alert_days: int = 92) -> str:
+_ALERT_HEADER = ["Alert code","Alert info","first occur","last occur","count","cause","action"]
+_COMBINED_ALERT_HEADER = ["Alert code","Alert info","first occur node","last occur node","first occur","last occur","count","cause","action"]
+
+def _scan_db_alerts(db_dir: Path, since: float, local_tz, checkpoints=None, workers: int = 1,
+                    matcher=None) -> Tuple[Optional[Any], List[str], str]:
     """
-    Count ONLY entries whose timestamp is within last `alert_days`.
-    Normalize tz: naive -> local tz; aware -> convert to local tz.
+    (alert_engine.AlertRuns or None, debug notes, skip message) for the alert logs of one DB folder.
+    Also the process-pool entry point when several RAC nodes are scanned at once.
     """
+    notes: List[str] = []
     log_dir = db_dir / "log"
     if not log_dir.exists():
-        msg = "⚠️ Skipped alert log (log folder not found)\n"
-        # Write header with new column even for skipped files
-        write_file(out_dir / "alert_report.csv", "Alert code,Alert info,first occur,last occur,count,cause,action\n")
-        return msg
-
-    dbname = db_dir.name
-    candidates = list(log_dir.glob(f"alert_{dbname}*.log")) or list(log_dir.glob("alert_*.log"))
-    print(f"[debug] DB dir: {db_dir}")
-    print(f"[debug] Log dir: {log_dir}")
-    print(f"[debug] Candidate logs: {[c.name for c in candidates]}")
-    if not candidates:
-        msg = "⚠️ Skipped alert log (no alert_*.log found)\n"
-        write_file(out_dir / "alert_report.csv", "Alert code,Alert info,first occur,last occur,count,cause,action\n")
-        return msg
-
-    if not alert_map:
-        msg = "❌ alert_log_check_mapped not importable\n"
-        write_file(out_dir / "alert_report.csv", "Alert code,Alert info,first occur,last occur,count,cause,action\n")
-        return msg
-
-    alert_path = candidates[0]
-    print(f"[debug] Using alert file: {alert_path}")
-    now_local = datetime.now().astimezone()
-    local_tz = now_local.tzinfo
-    since_dt = now_local - timedelta(days=alert_days)
-    ora_re = re.compile(r"\b(ORA-\d{5})\b[: ]?(.*)")
+        return None, notes, "⚠️ Skipped alert log (log folder not found)\n"
+    if not alert_engine:
+        return None, notes, "❌ alert_engine not importable\n"
+
+    candidates = alert_engine.log_candidates(log_dir, db_dir.name)
+    sids = [sid for sid in map(alert_engine.alert_log_sid, candidates) if sid]
+    xml_logs = alert_engine.xml_candidates(log_dir, db_dir.name, sids)
+    if not xml_logs and _normalize_db_name(db_dir.name) != db_dir.name.upper():
+        # e.g. a CDB_node1 folder whose ADR home is cdb/cdb1
+        xml_logs = alert_engine.xml_candidates(log_dir, _normalize_db_name(db_dir.name), sids)
+    notes.append(f"[debug] DB dir: {db_dir}")
+    notes.append(f"[debug] Log dir: {log_dir}")
+    notes.append(f"[debug] Candidate logs: {[c.name for c in candidates]}")
+    if xml_logs:
+        notes.append(f"[debug] ADR log.xml found: {[str(c.relative_to(log_dir)) for c in xml_logs]}")
+    if not candidates and not xml_logs:
+        return None, notes, "⚠️ Skipped alert log (no alert_*.log found)\n"
+
+    matcher = matcher or alert_engine.DEFAULT_MATCHER
+    try:
+        if xml_logs:
+            # structured records: no timestamp-line guessing, unless the text logs reach further back
+            xml_first = alert_engine.logs_first_ts(xml_logs, local_tz)
+            text_first = alert_engine.logs_first_ts(candidates, local_tz) if candidates else None
+            covers = xml_first is not None and (xml_first <= since or text_first is None or xml_first <= text_first)
+            if not covers and candidates:
+                notes.append("[debug] log.xml does not cover the window start; using the text alert log")
+            else:
+                try:
+                    runs = alert_engine.scan_alert_logs(xml_logs, since, local_tz, checkpoints, workers, log=notes.append, matcher=matcher)
+                    if runs.runs or not candidates:
+                        return runs, notes, ""
+                    notes.append("[debug] No events in log.xml; using the text alert log")
+                except ET.ParseError as e:
+                    notes.append(f"⚠️ log.xml not readable ({e}); using the text alert log")
+        runs = alert_engine.scan_alert_logs(candidates, since, local_tz, checkpoints, workers, log=notes.append, matcher=matcher)
+        return runs, notes, ""
+    except Exception as e:
+        return None, notes, f"❌ Alert report failed: {e}\n"
 
-    agg: Dict[str, Dict[str, Any]] = {}
-    current_ts_str: Optional[str] = None
-    current_ts_dt: Optional[datetime] = None
+def _alert_rows(agg: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    return sorted(agg.items(), key=lambda item: (item[1]['first'] is None, item[1]['first'] or 'ZZZ', item[0]))
 
-    try:
-        with alert_path.open("r", encoding="utf-8", errors="replace") as fp:
-            for raw in fp:
-                line = raw.rstrip("\n")
-                ts = parse_ts(line)
-                if ts:
-                    if ts.tzinfo is None: ts = ts.replace(tzinfo=local_tz)
-                    else: ts = ts.astimezone(local_tz)
-                    current_ts_dt = ts; current_ts_str = line.strip(); continue
-                m = ora_re.search(line)
-                if not m: continue
-                if current_ts_dt is None or current_ts_dt < since_dt: continue
-                
-                code = m.group(1).strip()
-                info = (m.group(2) or "").strip()
-
-                if code not in agg:
-                    agg[code] = {
-                        "first": current_ts_str, "first_dt": current_ts_dt,
-                        "last": current_ts_str, "last_dt": current_ts_dt,
-                        "info": info, "count": 1
-                    }
-                else:
-                    meta = agg[code]
-                    meta["count"] += 1
-                    # Update first occurrence if current is earlier
-                    if current_ts_dt < meta["first_dt"]:
-                        meta["first_dt"] = current_ts_dt
-                        meta["first"] = current_ts_str
-                        if info: meta["info"] = info
-                    # Update last occurrence if current is later
-                    if current_ts_dt > meta["last_dt"]:
-                        meta["last_dt"] = current_ts_dt
-                        meta["last"] = current_ts_str
-
-        rows = sorted(agg.items(), key=lambda item: (item[1]['first'] is None, item[1]['first'] or 'ZZZ', item[0]))
-        mapping = alert_map.load_mapping(str(map_csv)) if map_csv else {}
-
-        out_csv = out_dir / "alert_report.csv"
-        with out_csv.open("w", encoding="utf-8", newline="") as f:
-            w = csv.writer(f, lineterminator="\n")
-            w.writerow(["Alert code","Alert info","first occur","last occur","count","cause","action"])
-            for code, meta in rows:
-                m_map = mapping.get(code, {})
-                w.writerow([
-                    code,
-                    (meta.get("info") or "").replace("\n"," ").replace("\r"," "),
-                    meta.get("first") or "",
-                    meta.get("last") or "",  # <-- Added last occur
-                    meta.get("count", 0),
-                    m_map.get("cause",""),
-                    m_map.get("action",""),
-                ])
-
-        header = "Alert code,Alert info,first occur,last occur,count,cause,action"
-        out_text_lines = [header]
+def _write_alert_csv(out_csv: Path, rows: List[Tuple[str, Dict[str, Any]]]) -> str:
+    """Write the alert report CSV and return the console/Excel text version of it."""
+    with out_csv.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(_ALERT_HEADER)
         for code, meta in rows:
-            m_map = mapping.get(code, {})
-            out_text_lines.append(",".join([
+            w.writerow([
                 code,
-                (meta.get("info") or "").replace(","," ").replace("\n"," ").replace("\r"," "),
+                (meta.get("info") or "").replace("\n"," ").replace("\r"," "),
                 meta.get("first") or "",
                 meta.get("last") or "",  # <-- Added last occur
-                str(meta.get("count", 0)),
-                (m_map.get("cause","") or "").replace(","," "),
-                (m_map.get("action","") or "").replace(","," "),
-            ]))
-        return "\n".join(out_text_lines) + ("\n" if out_text_lines else "")
-
-    except Exception as e:
-        msg = f"❌ Alert report failed: {e}\n"
-        write_file(out_dir / "alert_report.csv", "Alert code,Alert info,first occur,last occur,count,cause,action\n")
-        return msg
-
-# ---- Node2 helpers ----
-def run_alert_log_custom(db_dir: Path, out_dir: Path, map_csv: Optional[Path], alert_days: int, out_name: str) -> str:
+                meta.get("count", 0),
+                meta["cause"],
+                meta["action"],
+            ])
+
+    out_text_lines = [",".join(_ALERT_HEADER)]
+    for code, meta in rows:
+        out_text_lines.append(",".join([
+            code,
+            (meta.get("info") or "").replace(","," ").replace("\n"," ").replace("\r"," "),
+            meta.get("first") or "",
+            meta.get("last") or "",  # <-- Added last occur
+            str(meta.get("count", 0)),
+            meta["cause"].replace(","," "),
+            meta["action"].replace(","," "),
+        ]))
+    return "\n".join(out_text_lines) + ("\n" if out_text_lines else "")
+
+_EVENT_HEADER = ["Event","Key","Info","first occur","last occur","count","per day"]
+
+def _write_event_csv(out_csv: Path, agg: Dict[str, Dict[str, Any]], matcher, alert_days: int) -> str:
+    """Write the non-ORA alert events CSV (one row per key, by event then count) and return it as text."""
+    rows = sorted(((matcher.kind_of(key) or "", key, meta) for key, meta in agg.items()),
+                  key=lambda r: (r[0], -r[2]["count"], r[1]))
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(_EVENT_HEADER)
+    for kind, key, meta in rows:
+        w.writerow([kind, key, (meta.get("info") or "").replace("\n"," ").replace("\r"," "),
+                    meta.get("first") or "", meta.get("last") or "", meta["count"],
+                    f"{meta['count'] / max(alert_days, 1):.1f}"])
+    write_file(out_csv, buf.getvalue())
+    return buf.getvalue()
+
+_TEMPLATE_HEADER = ["Alert code","Message template","count","max overcount","share"]
+# Variants per code printed on the console (the CSV has all that were kept)
+_TEMPLATE_CONSOLE_TOP = 3
+
+def _write_template_csv(out_csv: Path, rows: List[Tuple[str, Dict[str, Any]]], templates: Dict[str, Any]) -> str:
     """
-    Wrapper around run_alert_log but writes to a custom CSV filename in out_dir.
-    Returns the CSV-as-text that run_alert_log prints.
-    IMPORTANT: snapshots existing alert_report.csv and restores it to avoid overwriting node1.
+    Write the message templates (alert_engine.TopK per code) of the report rows, most frequent
+    first, and return the console text: the top variants of the codes that have several.
     """
-    default_csv = out_dir / "alert_report.csv"
-    snapshot = None
-    if default_csv.exists():
-        try:
-            snapshot = default_csv.read_text(encoding="utf-8")
-        except Exception:
-            snapshot = None
-
-    text = run_alert_log(db_dir, out_dir, map_csv, alert_days=alert_days)
+    out_lines = []
+    with out_csv.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(_TEMPLATE_HEADER)
+        for code, meta in rows:
+            sketch = templates.get(code)
+            if sketch is None:
+                continue
+            top = sketch.top()
+            for i, (template, count, err) in enumerate(top):
+                share = f"{100 * min(count, meta.get('count', 0)) / max(meta.get('count', 0), 1):.0f}%"  # merged sketches may overcount
+                w.writerow([code, template, count, err, share])
+                if len(top) > 1 and i < _TEMPLATE_CONSOLE_TOP:
+                    out_lines.append(f"{code} {share:>4} {template}")
+    return "\n".join(out_lines) + ("\n" if out_lines else "")
+
+def run_alert_nodes(db_dirs: List[Optional[Path]], out_dir: Path, map_csv: Optional[Path],
+                    alert_days: int = 92) -> Tuple[List[str], List[Optional[Any]]]:
+    """
+    Alert reports for the nodes of one DB: db_dirs[0] is node1 (alert_report.csv), db_dirs[k]
+    node k+1 (node{k+1}_alert_report.csv; None = no folder for that node, text ""). Count ONLY entries
+    whose timestamp is within last `alert_days`; naive timestamps are local time.
+    The nodes are scanned concurrently when _alert_workers > 1, their aggregates kept in
+    memory and, with more than one node folder, k-way merged into combine_alert_report.csv.
+    Each node's day buckets (alert_engine.AlertBuckets) are saved next to its CSV
+    (alert_buckets.json / node{k+1}_alert_buckets.json), and so are the counts of the other
+    alert events (TNS-, log switches, ...: alert_events.csv / node{k+1}_alert_events.csv) and
+    the occurrence offsets for `mini_pm.py alert-show` (alert_index.json.gz / node{k+1}_...)
+    and the dominant message variants per code (alert_templates.csv / node{k+1}_...).
+    Returns the CSV-as-text (or skip message) and the AlertBuckets (or None) per node.
+    """
+    now_local = datetime.now().astimezone()
+    local_tz = now_local.tzinfo
+    since = (now_local - timedelta(days=alert_days)).timestamp()
+    dirs = [d for d in db_dirs if d is not None]
 
-    # Copy to custom name (node2) and then restore snapshot
-    custom_csv = out_dir / out_name
-    try:
-        if default_csv.exists():
-            custom_csv.write_text(default_csv.read_text(encoding="utf-8"), encoding="utf-8")
+    results = None
+    if _alert_workers > 1 and len(dirs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(_alert_workers, len(dirs))) as pool:
+                futs = [pool.submit(_scan_db_alerts, d, since, local_tz, _alert_checkpoints, 1, _alert_matcher) for d in dirs]
+                results = [f.result() for f in futs]
+        except Exception as e:
+            print(f"⚠️ Parallel node alert scan failed ({e}); scanning serially")
+    if results is None:
+        results = [_scan_db_alerts(d, since, local_tz, _alert_checkpoints, _alert_workers, _alert_matcher) for d in dirs]
+    results = iter(results)
+
+    mapping = {}
+    if map_csv:
+        if not alert_map:
+            print("⚠️ alert_log_check_mapped not importable (will omit cause/action)")
         else:
-            custom_csv.write_text("Alert code,Alert info,first occur,last occur,count,cause,action\n", encoding="utf-8")
-    except Exception as e:
-        print(f"[debug] Failed to write {custom_csv}: {e}")
-
-    # Restore node1 CSV if we had a snapshot
-    if snapshot is not None:
+            try:
+                mapping = alert_map.load_mapping(str(map_csv), _mapping_cache_dir)
+            except Exception as e:
+                print(f"⚠️ Mapping CSV not readable ({e}); will omit cause/action")
+
+    texts: List[str] = []
+    node_aggs: List[Dict[str, Dict[str, Any]]] = []
+    node_buckets: List[Optional[Any]] = []
+    matcher = _alert_matcher or (alert_engine.DEFAULT_MATCHER if alert_engine else None)
+    for i, d in enumerate(db_dirs):
+        if d is None:
+            node_aggs.append({}); node_buckets.append(None); texts.append(""); continue
+        prefix = "" if i == 0 else f"node{i + 1}_"
+        out_csv = out_dir / f"{prefix}alert_report.csv"
+        runs, notes, msg = next(results)
+        for note in notes:
+            print(note)
+        agg, buckets = {}, None
+        if runs is not None:
+            agg = alert_engine.summarize(runs, since, mapping)
+            buckets = alert_engine.aggregate(runs, alert_engine.Window(since, alert_engine.Kinds(
+                ["ORA"], alert_engine.DailyBuckets(), matcher)))
+            try:
+                buckets.save(out_dir / f"{prefix}alert_buckets.json")
+            except Exception as e:
+                print(f"[debug] Failed to save alert buckets: {e}")
+            try:
+                alert_engine.save_offset_index(runs, out_dir / f"{prefix}alert_index.json.gz")
+            except Exception as e:
+                print(f"[debug] Failed to save alert offset index: {e}")
+            try:
+                # counted while scanning, over the same window as the report
+                variants = _write_template_csv(out_dir / f"{prefix}alert_templates.csv", _alert_rows(agg), runs.templates)
+                if variants:
+                    print(f"Message variants ({prefix}alert_templates.csv):")
+                    print(variants, end="")
+            except Exception as e:
+                print(f"[debug] Failed to write alert message templates: {e}")
+            events = alert_engine.summarize(runs, since, kinds=[p[0] for p in matcher.patterns[1:]], matcher=matcher)
+            try:
+                events_text = _write_event_csv(out_dir / f"{prefix}alert_events.csv", events, matcher, alert_days)
+                if events:
+                    print(f"Other alert events ({prefix}alert_events.csv):")
+                    print(events_text, end="")
+            except Exception as e:
+                print(f"[debug] Failed to write alert events: {e}")
+        node_aggs.append(agg)
+        node_buckets.append(buckets)
         try:
-            default_csv.write_text(snapshot, encoding="utf-8")
-            print("[debug] Restored alert_report.csv after node2 processing")
+            text = _write_alert_csv(out_csv, _alert_rows(agg))
+            texts.append(msg or text)
         except Exception as e:
-            print(f"[debug] Failed to restore alert_report.csv: {e}")
+            write_file(out_csv, ",".join(_ALERT_HEADER) + "\n")
+            texts.append(f"❌ Alert report failed: {e}\n")
 
-    return text
+    if len(dirs) > 1:
+        combined_csv = out_dir / "combine_alert_report.csv"
+        try:
+            _write_combined_alerts(combined_csv, node_aggs)
+            print(f"Combined alert CSV written: {combined_csv}")
+        except Exception as e:
+            print(f"❌ Failed to combine alert CSVs: {e}")
+    return texts, node_buckets
 
+def run_alert_log(db_dir: Path, out_dir: Path, map_csv: Optional[Path], alert_days: int = 92) -> str:
+    """
+    Count ONLY entries whose timestamp is within last `alert_days`.
+    Normalize tz: naive -> local tz; aware -> convert to local tz.
+    """
+    return run_alert_nodes([db_dir], out_dir, map_csv, alert_days)[0][0]
 
-def combine_alert_csvs(csv1: Path, csv2: Path, out_csv: Path) -> None:
+def _write_combined_alerts(out_csv: Path, node_aggs: List[Dict[str, Dict[str, Any]]]) -> None:
     """
-    Combine node1 (csv1) and node2 (csv2) alerts by 'Alert code' without pandas.
+    Combine per-node aggregates by 'Alert code' (k-way merge of the code-sorted node reports).
     Output columns:
       Alert code,Alert info,first occur node,last occur node,first occur,last occur,count,cause,action
-    - first/last occur node: "node1" or "node2" depending on which node had the min/max timestamp.
-    - first/last occur: ISO strings kept as-is from inputs.
+    - first/last occur node: "nodeN" of the node with the min/max timestamp (lowest N on ties).
+    - first/last occur: timestamp strings kept as-is from the nodes.
     - count: sum of counts.
-    - info/cause/action: prefer non-empty from node1, else node2.
+    - info/cause/action: first non-empty in node order.
     """
-    import csv
-    from datetime import datetime
-
-    header_in = ["Alert code","Alert info","first occur","last occur","count","cause","action"]
-    header_out = ["Alert code","Alert info","first occur node","last occur node","first occur","last occur","count","cause","action"]
-
-    def read_csv(path: Path):
-        data = {}
-        if not path.exists():
-            return data
-        with path.open("r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                code = (row.get("Alert code") or "").strip()
-                if not code:
-                    continue
-                # normalize fields
-                rec = {
-                    "info": (row.get("Alert info") or "").strip(),
-                    "first": (row.get("first occur") or "").strip(),
-                    "last":  (row.get("last occur")  or "").strip(),
-                    "count": int(str(row.get("count") or "0").strip() or 0),
-                    "cause": (row.get("cause") or "").strip(),
-                    "action":(row.get("action") or "").strip(),
-                }
-                data[code] = rec
-        return data
-
-    def parse_ts(s: str):
-        # Try multiple formats but keep as comparable strings if parse fails
-        if not s:
-            return None
-        try:
-            # Most inputs are ISO-like; fromisoformat handles 'YYYY-MM-DDTHH:MM:SS' variants
-            return datetime.fromisoformat(s.replace("Z","+00:00")) if ("T" in s or "-" in s) else None
-        except Exception:
-            return None
-
-    d1 = read_csv(csv1)  # node1
-    d2 = read_csv(csv2)  # node2
-
-    codes = sorted(set(d1.keys()) | set(d2.keys()))
+    streams = [[(code, n, meta) for code, meta in sorted(agg.items())] for n, agg in enumerate(node_aggs, 1)]
     rows = []
-
-    for code in codes:
-        r1 = d1.get(code, {})
-        r2 = d2.get(code, {})
-
-        info  = r1.get("info") or r2.get("info") or ""
-        cause = r1.get("cause") or r2.get("cause") or ""
-        action= r1.get("action") or r2.get("action") or ""
-        count = (r1.get("count",0) or 0) + (r2.get("count",0) or 0)
-
-        f1, f2 = r1.get("first",""), r2.get("first","")
-        l1, l2 = r1.get("last",""),  r2.get("last","")
-
-        # Determine first occur across nodes
-        f1_dt, f2_dt = parse_ts(f1), parse_ts(f2)
-        if f1 and f2:
-            if (f1_dt and f2_dt):
-                first, first_node = (f1, "node1") if f1_dt <= f2_dt else (f2, "node2")
-            else:
-                # fallback lexical compare
-                first, first_node = (f1, "node1") if f1 <= f2 else (f2, "node2")
-        elif f1:
-            first, first_node = f1, "node1"
-        elif f2:
-            first, first_node = f2, "node2"
-        else:
-            first, first_node = "", ""
-
-        # Determine last occur across nodes
-        l1_dt, l2_dt = parse_ts(l1), parse_ts(l2)
-        if l1 and l2:
-            if (l1_dt and l2_dt):
-                last, last_node = (l1, "node1") if l1_dt >= l2_dt else (l2, "node2")
-            else:
-                last, last_node = (l1, "node1") if l1 >= l2 else (l2, "node2")
-        elif l1:
-            last, last_node = l1, "node1"
-        elif l2:
-            last, last_node = l2, "node2"
-        else:
-            last, last_node = "", ""
-
-        rows.append([code, info, first_node, last_node, first, last, count, cause, action])
+    group: List[Tuple[int, Dict[str, Any]]] = []
+
+    def flush(code: str) -> None:
+        pick = lambda key: next((meta[key] for _, meta in group if meta.get(key)), "")
+        first_n, first = min(((n, m) for n, m in group), key=lambda x: (x[1]["first_e"], x[0]))
+        last_n, last = min(((n, m) for n, m in group), key=lambda x: (-x[1]["last_e"], x[0]))
+        rows.append([code, pick("info"), f"node{first_n}", f"node{last_n}", first["first"], last["last"],
+                     sum(meta["count"] for _, meta in group), pick("cause"), pick("action")])
+
+    prev = None
+    for code, n, meta in heapq.merge(*streams, key=lambda x: (x[0], x[1])):
+        if code != prev and group:
+            flush(prev); group = []
+        prev = code
+        group.append((n, meta))
+    if group:
+        flush(prev)
 
     with out_csv.open("w", encoding="utf-8", newline="") as f:
         writer = csv.writer(f, lineterminator="\n")
-        writer.writerow(header_out)
-        for r in rows:
-            writer.writerow(r)
+        writer.writerow(_COMBINED_ALERT_HEADER)
+        writer.writerows(rows)
 
 
 def run_backups(db_dir: Path, out_dir: Path, days: int = 7) -> str:
@@ -884,7 +1110,46 @@ def _write_excel(rows: List[Dict[str,str]], out_path: Path):
         ws.set_column("G:G", None, None, {'hidden': True})
 
 # ------------- Orchestrate -------------
-def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, report_root: Path, alert_days: int, node2_input: Optional[Path] = None, old_input: Optional[Path] = None) -> None:
+def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, report_root: Path, alert_days: int, node2_input: Optional[Path] = None, old_input: Optional[Path] = None,
+            use_cache: bool = False, cache_dir: Optional[Path] = None, awr_workers: int = 1, alert_workers: int = 1,
+            node_inputs: Optional[List[Path]] = None, alert_patterns: Optional[Path] = None) -> None:
+    """
+    node2_input / node_inputs: Zip/folder per additional RAC node (alert log only), node2 first.
+    alert_patterns: CSV of alert event patterns (name,triggers,regex) instead of the built-in ones.
+    use_cache: keep AWR results, alert log checkpoints and the compiled ORA mapping under
+    ~/.cache/pm_helper (or cache_dir for AWR) across runs; off unless the caller opts in.
+    """
+    global _awr_session, _alert_checkpoints, _alert_workers, _mapping_cache_dir, _alert_matcher
+    _alert_workers = max(1, alert_workers)
+    if alert_patterns and alert_engine:
+        try:
+            _alert_matcher = alert_engine.EventMatcher(alert_engine.load_event_patterns(alert_patterns))
+        except Exception as e:
+            print(f"⚠️ Alert pattern CSV not readable ({e}); using the built-in patterns")
+    _mapping_cache_dir = alert_map.DEFAULT_MAPPING_CACHE_DIR if use_cache and alert_map else None
+    cache = None
+    if use_cache and awr_cache:
+        try:
+            cache = awr_cache.AwrCache(cache_dir or awr_cache.DEFAULT_CACHE_DIR)
+        except Exception as e:
+            print(f"⚠️ AWR cache disabled: {e}")
+    _alert_checkpoints = alert_checkpoint.AlertCheckpoints() if use_cache and alert_checkpoint else None
+    _awr_session = AwrSession(cache, workers=awr_workers)
+    try:
+        node_inputs = ([node2_input] if node2_input else []) + list(node_inputs or [])
+        _run_all(input_path, map_csv, target_version, report_root, alert_days, node_inputs, old_input)
+        print(_awr_session.summary())
+    finally:
+        if cache:
+            cache.flush()
+        if _alert_checkpoints:
+            _alert_checkpoints.flush()
+        _awr_session = None
+        _alert_checkpoints = None
+        _mapping_cache_dir = None
+        _alert_matcher = None
+
+def _run_all(input_path: Path, map_csv: Optional[Path], target_version: str, report_root: Path, alert_days: int, node_inputs: List[Path], old_input: Optional[Path] = None) -> None:
     # We still show the top label in console/summary, but Excel 'System Name' = CDB folder
     if is_zip(input_path):
         print(f"→ Extracting zip: {input_path}")
@@ -900,25 +1165,25 @@ def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, repo
         print("No database folders found (need subfolders with auto_collection/report/log).")
         return
 
-    # Optional node2 directories (by DB folder name)
-    node2_dirs_by_name: Dict[str, Path] = {}
+    # Optional node2..N directories (by DB folder name)
+    node_dirs_by_name: List[Dict[str, Path]] = []
     # Optional OLD input directories (AWR-only by DB folder name)
     old_dirs_by_name: Dict[str, Path] = {}
-    if node2_input:
-        if is_zip(node2_input):
-            print(f"→ Extracting node2 zip: {node2_input}")
-            node2_root = extract_zip(node2_input)
+    for n, node_input in enumerate(node_inputs, 2):
+        if is_zip(node_input):
+            print(f"→ Extracting node{n} zip: {node_input}")
+            node_root = extract_zip(node_input)
         else:
-            node2_root = node2_input
-        node2_first = find_first_level_used(node2_root)
-        pairs = []
-        for p in list_database_dirs(node2_first):
+            node_root = node_input
+        dirs_by_name: Dict[str, Path] = {}
+        for p in list_database_dirs(find_first_level_used(node_root)):
             key = _normalize_db_name(p.name)
-            node2_dirs_by_name[key] = p
-        if node2_dirs_by_name:
-            print("Node2 databases found (normalized keys): " + ", ".join(sorted(node2_dirs_by_name.keys())))
+            dirs_by_name[key] = p
+        if dirs_by_name:
+            print(f"Node{n} databases found (normalized keys): " + ", ".join(sorted(dirs_by_name.keys())))
         else:
-            print("Node2 input provided, but no DB folders found.")
+            print(f"Node{n} input provided, but no DB folders found.")
+        node_dirs_by_name.append(dirs_by_name)
 
     if old_input:
         if is_zip(old_input):
@@ -963,25 +1228,19 @@ def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, repo
         awr_selected, awr_text = run_awr(db, out_dir, copy_selected_to=out_dir)
         # Prepare old AWR text if provided
         old_awr_text = ""
-        if old_dirs_by_name:
-            key = _normalize_db_name(cdb_name)
-            old_db = old_dirs_by_name.get(key)
-            if old_db:
-                best_old = _select_best_awr(old_db)
-                if best_old:
-                    print(f"[debug] Old AWR chosen for trend: {best_old}")
-                    old_awr_text = _render_awr_text(best_old)
         # Append old values to Instance Efficiency lines < 70%
         # Prefer structured dict from old AWR so we have ALL metrics, not only old warnings
         old_ie = {}
         if old_dirs_by_name:
             key = _normalize_db_name(cdb_name)
             old_db = old_dirs_by_name.get(key)
-            if old_db:
-                best_old = _select_best_awr(old_db)
-                if best_old and awr_analyzer:
+            best_old = _select_best_awr(old_db) if old_db else None
+            if best_old:
+                print(f"[debug] Old AWR chosen for trend: {best_old}")
+                old_awr_text = _render_awr_text(best_old)
+                if awr_analyzer:
                     try:
-                        old_data = awr_analyzer.analyze(best_old)
+                        old_data = _analyze_awr(best_old)  # same session: already parsed for the text above
                         old_ie = old_data.get("Instance Efficiency Percentages (Target 100%)") or {}
                     except Exception:
                         old_ie = {}
@@ -997,31 +1256,23 @@ def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, repo
         ts_text, ts_items = run_tablespace_checks(db, out_dir)
         print(ts_text, end="")
 
-        # 2.4 ALERT (CDB-wide)
+        # 2.4 ALERT (CDB-wide) + NODE2..N ALERT + COMBINED (if available for this DB folder)
         print(f"\n--- ALERT LOG (last {alert_days} days) ---")
-        alert_csv_or_msg = run_alert_log(db, out_dir, map_csv, alert_days=alert_days)
+        key = _normalize_db_name(cdb_name)
+        node_dbs = [db] + [dirs_by_name.get(key) for dirs_by_name in node_dirs_by_name]
+        alert_texts, alert_buckets = run_alert_nodes(node_dbs, out_dir, map_csv, alert_days=alert_days)
+        alert_csv_or_msg = alert_texts[0]
         print(alert_csv_or_msg, end="" if alert_csv_or_msg.endswith("\n") else "\n")
         a_sev = severity_alert(alert_csv_or_msg)
-
-        # 2.4.1 NODE2 ALERT + COMBINED (if available for this DB folder)
-        if node2_dirs_by_name:
-            key = _normalize_db_name(cdb_name)
-            db2 = node2_dirs_by_name.get(key)
-            if db2:
-                print(f"\n--- NODE2 ALERT LOG (alert-only) [paired {cdb_name} ↔ {db2.name}] ---")
-                node2_text = run_alert_log_custom(db2, out_dir, map_csv, alert_days=alert_days, out_name="node2_alert_report.csv")
-                print(node2_text, end="" if node2_text.endswith("\n") else "\n")
-                # Combine
-                try:
-                    node1_csv = out_dir / "alert_report.csv"
-                    node2_csv = out_dir / "node2_alert_report.csv"
-                    combined_csv = out_dir / "combine_alert_report.csv"
-                    combine_alert_csvs(node1_csv, node2_csv, combined_csv)
-                    print(f"Combined alert CSV written: {combined_csv}")
-                except Exception as e:
-                    print(f"❌ Failed to combine alert CSVs: {e}")
+        alert_trend = alert_trend_text(alert_buckets[0], alert_days) if alert_buckets[0] else ""
+        if alert_trend:
+            print(alert_trend)
+        for n, (node_db, node_text) in enumerate(zip(node_dbs[1:], alert_texts[1:]), 2):
+            if node_db:
+                print(f"\n--- NODE{n} ALERT LOG (alert-only) [paired {cdb_name} ↔ {node_db.name}] ---")
+                print(node_text, end="" if node_text.endswith("\n") else "\n")
             else:
-                print("\n--- NODE2 ALERT LOG ---\n(no matching DB folder for node2)")
+                print(f"\n--- NODE{n} ALERT LOG ---\n(no matching DB folder for node{n})")
 
         # 2.5 BACKUP (CDB-wide)
         print("\n--- BACKUP CHECK ---")
@@ -1078,7 +1329,7 @@ def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, repo
                 "Checklist Items": "Database Alert log",
                 "Status": _status_from_sev(a_sev),
                 "Severity": _sev_label(a_sev),
-                "Description": _desc_lines_from(alert_csv_or_msg, max_lines=8) if a_sev < 4 else "No ORA-* in the last window.",
+                "Description": (_desc_lines_from(alert_csv_or_msg, max_lines=8) + ("\n" + alert_trend if alert_trend else "")) if a_sev < 4 else "No ORA-* in the last window.",
             })
             # Backups (CDB result repeated per PDB)
             excel_rows.append({
@@ -1104,7 +1355,35 @@ def run_all(input_path: Path, map_csv: Optional[Path], target_version: str, repo
     print(f"EXCEL  : {report_root / 'pm_summary.xlsx'}")
     print("="*80)
 
+def alert_show_main(argv: List[str]) -> None:
+    """mini_pm.py alert-show --code ORA-00600 [--n 20]: occurrences from a report's alert index, no rescan."""
+    ap = argparse.ArgumentParser(prog="mini_pm.py alert-show", description="Show alert log occurrences of one code (or event) with context, using the offset index saved with the alert report.")
+    ap.add_argument("--code", required=True, help="Alert code or event key as in the report (e.g. ORA-00600, TNS-12535, Log switch)")
+    ap.add_argument("--n", type=int, default=20, help="Show the last N occurrences (default: 20; 0 = all)")
+    ap.add_argument("--context", type=int, default=3, help="Lines shown before and after each occurrence (default: 3)")
+    ap.add_argument("--report", default="mini_pm_report", help="Report folder (or alert_index.json.gz file) of the mini_pm run (default: mini_pm_report)")
+    ap.add_argument("--db", default=None, help="CDB folder name, when the report holds several")
+    ap.add_argument("--node", type=int, default=1, help="RAC node number (default: 1)")
+    args = ap.parse_args(argv)
+    if not alert_engine: raise SystemExit("alert_engine not importable")
+
+    report = Path(args.report)
+    name = "alert_index.json.gz" if args.node <= 1 else f"node{args.node}_alert_index.json.gz"
+    if report.is_dir():
+        found = sorted(p for p in report.rglob(name) if not args.db or p.parent.name == args.db)
+        if not found:
+            raise SystemExit(f"No {name} under {report}")
+        if len(found) > 1:
+            raise SystemExit(f"Several DBs in {report}, pick one with --db: {[p.parent.name for p in found]}")
+        report = found[0]
+    if not report.exists(): raise SystemExit(f"Not found: {report}")
+    total = alert_engine.show_occurrences(alert_engine.load_offset_index(report), args.code, args.n, args.context)
+    if not total:
+        print(f"No {args.code} occurrences in {report}")
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "alert-show":
+        alert_show_main(sys.argv[2:]); return
     ap = argparse.ArgumentParser(description="Run PM workflow, print all, save under mini_pm_report and build Excel summary (Book2 layout).")
     ap.add_argument("input", help="Zip file OR extracted folder (e.g., ...\\PM_node1_week2)")
     ap.add_argument("--map", help="Path to ora_code_table.csv", default=None)
@@ -1112,11 +1391,26 @@ def main():
     ap.add_argument("--out", default="mini_pm_report", help="Output root folder (default: mini_pm_report)")
     ap.add_argument("--alert-days", type=int, default=92, help="Only include alert entries for the last N days (default ~3 months)")
     ap.add_argument("--node2-input", help="Zip/folder for node2 (alert log only)", default=None)
+    ap.add_argument("--node-input", action="append", default=[], help="Zip/folder for one more RAC node (alert log only); repeat for node3, node4, ... (after --node2-input)")
     ap.add_argument("--old-input", help="Zip/folder for OLD base (AWR only, for Instance Efficiency trend)", default=None)
+    ap.add_argument("--cache", action="store_true", help="Keep on-disk caches under ~/.cache/pm_helper across runs (AWR results, alert log checkpoints, compiled ORA mapping)")
+    ap.add_argument("--no-cache", dest="cache", action="store_false", help="Do not read or write the on-disk caches (default)")
+    ap.add_argument("--cache-dir", default=None, help="AWR result cache folder (implies --cache; default: ~/.cache/pm_helper/awr)")
+    ap.add_argument("--awr-workers", type=int, default=1, help="Processes used to score report/*.html (default: 1; 0 = one per CPU)")
+    ap.add_argument("--alert-workers", type=int, default=1, help="Processes used to parse a big alert log (default: 1; 0 = one per CPU)")
+    ap.add_argument("--alert-patterns", default=None, help="CSV of alert events to count besides ORA- (columns name,triggers,regex; triggers separated by |)")
+    ap.add_argument("--bench-alert", action="store_true", help="Treat input as an alert log and time ORA- only vs all event patterns, serial vs --alert-workers")
+    ap.add_argument("--bench-alert-xml", default=None, help="With --bench-alert: ADR log.xml of the same log, timed against the text scan")
     args = ap.parse_args()
 
     input_path = Path(args.input)
     if not input_path.exists(): raise SystemExit(f"Not found: {input_path}")
+    alert_workers = args.alert_workers if args.alert_workers > 0 else (os.cpu_count() or 1)
+    if args.bench_alert:
+        if not alert_engine: raise SystemExit("alert_engine not importable")
+        matcher = alert_engine.EventMatcher(alert_engine.load_event_patterns(Path(args.alert_patterns))) if args.alert_patterns else alert_engine.DEFAULT_MATCHER
+        alert_engine.bench(input_path, alert_workers, Path(args.bench_alert_xml) if args.bench_alert_xml else None, matcher)
+        return
     map_csv = Path(args.map) if args.map else None
     if map_csv and not map_csv.exists():
         print(f"⚠️ Mapping CSV not found: {map_csv} (will omit cause/action)")
@@ -1124,7 +1418,10 @@ def main():
     report_root = Path(args.out) if Path(args.out).is_absolute() else Path.cwd() / args.out
     node2_input = Path(args.node2_input) if args.node2_input else None
     old_input = Path(args.old_input) if args.old_input else None
-    run_all(input_path, map_csv, args.target_version, report_root, alert_days=args.alert_days, node2_input=node2_input, old_input=old_input)
+    run_all(input_path, map_csv, args.target_version, report_root, alert_days=args.alert_days, node2_input=node2_input, old_input=old_input,
+            use_cache=args.cache or bool(args.cache_dir), cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+            awr_workers=args.awr_workers if args.awr_workers > 0 else (os.cpu_count() or 1), alert_workers=alert_workers,
+            node_inputs=[Path(p) for p in args.node_input], alert_patterns=Path(args.alert_patterns) if args.alert_patterns else None)
 
 if __name__ == "__main__":
     main()
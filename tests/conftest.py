@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the app modules are flat scripts that import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
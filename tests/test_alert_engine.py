@@ -0,0 +1,331 @@
+"""
+alert_engine scans compared against each other and against the original line-by-line
+parse_alerts(): serial vs parallel, checkpointed vs full, gzip vs plain, log.xml vs text,
+window seek vs full read, on a small generated alert log; and the fast timestamp parser
+against the strptime chain it replaces.
+"""
+import gzip
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+import alert_checkpoint
+import alert_engine
+
+TZ = timezone(timedelta(hours=7))
+CODES = ["ORA-00600", "ORA-07445", "ORA-01555", "ORA-04031", "ORA-00060"]
+INFOS = ["", "internal error code, arguments: [kcbz_check_objd_typ], [0], [%d]",
+         "snapshot too old: rollback segment number %d with name \"_SYSSMU%d$\" too small",
+         "unable to allocate %d bytes of shared memory", "deadlock detected while waiting for resource"]
+
+
+def gen_blocks(seed=1, n=1500):
+    """[(timestamp line, [message lines])] in time order, 12c ISO timestamps."""
+    rnd = random.Random(seed)
+    t = datetime(2026, 1, 1, tzinfo=TZ)
+    blocks = []
+    for _ in range(n):
+        t += timedelta(seconds=rnd.randint(1, 6 * 3600))
+        msgs = []
+        for _ in range(rnd.choice([0, 1, 1, 2, 3])):
+            info = rnd.choice(INFOS)
+            info = info % ((rnd.randint(1, 50),) * info.count("%d"))
+            msgs.append(f"{rnd.choice(CODES)}: {info}".rstrip() if info else f"{rnd.choice(CODES)}:")
+        if rnd.random() < .3:
+            msgs.append(rnd.choice(["Thread 1 advanced to log sequence %d (LGWR switch)" % rnd.randint(1, 999),
+                                    "Checkpoint not complete", "Completed: ALTER DATABASE OPEN"]))
+        blocks.append((t.isoformat(timespec="microseconds"), msgs))
+    return blocks
+
+
+def text_log(blocks):
+    return "".join(ts + "\n" + "".join(m + "\n" for m in msgs) for ts, msgs in blocks)
+
+
+def xml_log(blocks):
+    out = []
+    for ts, msgs in blocks:
+        txt = escape("\n".join(msgs), {"'": "&apos;"})
+        out.append(f"<msg time='{ts}' org_id='oracle' comp_id='rdbms'\n type='UNKNOWN' level='16' host_id='db1'\n"
+                   f" host_addr='10.0.0.1' pid='1234'>\n <txt>{txt}\n </txt>\n</msg>\n")
+    return "".join(out)
+
+
+def baseline_parse_alerts(fp):
+    """parse_alerts() as alert_log_check.py had it before the shared engine."""
+    ts_re = re.compile(r'^\d{4}-\d{2}-\d{2}T\S+$')
+    ora_re = re.compile(r'^(ORA-\d{5}):\s*(.*)$')
+    current_ts = None
+    agg = {}
+    for raw in fp:
+        line = raw.rstrip('\n')
+        if ts_re.match(line):
+            current_ts = line.strip()
+            continue
+        m = ora_re.match(line)
+        if m:
+            code, info = m.group(1).strip(), m.group(2).strip()
+            if code not in agg:
+                agg[code] = {'first': current_ts, 'last': current_ts, 'info': info, 'count': 1}
+                continue
+            agg[code]['count'] += 1
+            if current_ts is not None and (agg[code]['first'] is None or current_ts < agg[code]['first']):
+                agg[code]['first'] = current_ts
+                agg[code]['info'] = info
+            if current_ts is not None and (agg[code]['last'] is None or current_ts > agg[code]['last']):
+                agg[code]['last'] = current_ts
+    return agg
+
+
+def scan(paths, since=alert_engine.NO_WINDOW, **kw):
+    return alert_engine.scan_alert_logs(paths, since, TZ, log=None, **kw)
+
+
+def report(runs, since=alert_engine.NO_WINDOW):
+    return {code: (m["first"], m["last"], m["info"], m["count"])
+            for code, m in alert_engine.summarize(runs, since).items()}
+
+
+def write_log(tmp_path, blocks, name="alert_DB1.log"):
+    path = tmp_path / name
+    path.write_text(text_log(blocks), encoding="utf-8")
+    return path
+
+
+def test_matches_baseline_parse_alerts(tmp_path):
+    path = write_log(tmp_path, gen_blocks())
+    with path.open(encoding="utf-8") as fp:
+        expected = {code: (m["first"], m["last"], m["info"], m["count"]) for code, m in baseline_parse_alerts(fp).items()}
+    assert report(scan([path])) == expected
+
+
+TS_CASES = [
+    "2026-01-01T12:00:00.123456+07:00",   # 12c ISO
+    "2026-01-01T12:00:00+07:00",          # no fractional seconds
+    "2026-01-01T12:00:00.123456-03:30",
+    "2026-01-01T12:00:00.123456Z",
+    "2026-01-01T12:00:00Z",
+    "2026-01-01T12:00:00.123456",         # naive
+    "2026-01-01T12:00:00",
+    "2026-01-01 12:00:00",
+    "  2026-01-01T12:00:00.000000+00:00  ",
+    "Mon Jan 01 12:00:00 2026",           # 11g
+    "Thu Jan 01 12:00:00 2026",           # weekday not the real one: strptime ignores it
+    "Fri Feb 27 23:59:59 2026",
+    "mon jan 01 12:00:00 2026",
+    "2026-02-30T12:00:00.000000+07:00",   # invalid dates and times
+    "2026-13-01T12:00:00",
+    "2026-01-01T24:00:00",
+    "2026-01-01T12:60:00",
+    "2026-01-01T12:00:00+24:00",
+    "Mon Feb 30 12:00:00 2026",
+    "Mon Foo 01 12:00:00 2026",
+    "2026-01-01Tfoo",                     # only looks like a timestamp
+    "2026-01-01T12:00:00.123456+07:00 Starting ORACLE instance",
+    "2026-01-01T12:00:00.123",
+    "2026-01-01",
+    "2026",
+    "Mon Jan 01 12:00:00 2026 trailing",
+    "Monday",
+    "ORA-00600: internal error code",
+    "Thread 1 advanced to log sequence 42",
+    "",
+]
+
+
+def test_fast_timestamp_parse_matches_strptime_chain():
+    def key(ts):
+        return None if ts is None else (ts.replace(tzinfo=None), ts.utcoffset())
+    for line in TS_CASES:
+        slow = alert_engine._parse_ts_slow(line.strip())
+        assert key(alert_engine.parse_ts(line)) == key(slow), line
+        local_offset = 7 * 3600
+        expected = None
+        if slow is not None:
+            expected = (slow if slow.tzinfo else slow.replace(tzinfo=timezone(timedelta(hours=7)))).timestamp()
+        assert alert_engine.ts_epoch(line, local_offset) == expected, line
+        fields = alert_engine._ts_fields(line.strip())
+        if fields is alert_engine._NOT_TS:
+            assert slow is None, line
+        elif fields is not None:
+            _, y, mo, d, hh, mi, ss, us, off = fields
+            assert slow is not None and key(slow) == (datetime(y, mo, d, hh, mi, ss, us),
+                                                      None if off is None else timedelta(seconds=off)), line
+    # the layouts Oracle writes never need the slow path
+    for line in TS_CASES[:13]:
+        assert alert_engine._ts_fields(line.strip()) not in (None, alert_engine._NOT_TS), line
+
+
+def test_parallel_matches_serial(tmp_path, monkeypatch, capsys):
+    path = write_log(tmp_path, gen_blocks())
+    serial = scan([path])
+    monkeypatch.setattr(alert_engine, "_ALERT_PARALLEL_MIN_BYTES", 0)
+    notes = []
+    parallel = alert_engine.scan_alert_logs([path], alert_engine.NO_WINDOW, TZ, workers=3, log=notes.append)
+    assert not any("Parallel alert scan failed" in n for n in notes)
+    assert capsys.readouterr().out == ""
+    assert parallel.runs == serial.runs
+    assert report(parallel) == report(serial)
+
+
+def test_gzip_matches_plain(tmp_path):
+    blocks = gen_blocks()
+    path = write_log(tmp_path, blocks)
+    gz = tmp_path / "alert_DB1.log.1.gz"
+    gz.write_bytes(gzip.compress(path.read_bytes()))
+    assert scan([gz]).runs == scan([path]).runs
+
+
+def test_xml_matches_text(tmp_path):
+    blocks = gen_blocks()
+    path = write_log(tmp_path, blocks)
+    xml = tmp_path / "log.xml"
+    xml.write_text(xml_log(blocks), encoding="utf-8")
+    assert report(scan([xml])) == report(scan([path]))
+
+
+def test_checkpointed_matches_full_scan(tmp_path):
+    blocks = gen_blocks()
+    path = write_log(tmp_path, blocks[:900])
+    checkpoints = alert_checkpoint.AlertCheckpoints(tmp_path / "ck")
+    since = datetime(2026, 2, 1, tzinfo=TZ).timestamp()
+    first = scan([path], since, checkpoints=checkpoints)
+    assert report(first, since) == report(scan([path], since), since)
+
+    with path.open("a", encoding="utf-8") as f:
+        f.write(text_log(blocks[900:]))
+    notes = []
+    resumed = alert_engine.scan_alert_logs([path], since, TZ, checkpoints, log=notes.append)
+    assert any("resuming at byte" in n for n in notes)
+    assert report(resumed, since) == report(scan([path], since), since)
+
+
+def test_checkpoint_not_used_after_rewrite(tmp_path):
+    path = write_log(tmp_path, gen_blocks(seed=1))
+    checkpoints = alert_checkpoint.AlertCheckpoints(tmp_path / "ck")
+    scan([path], checkpoints=checkpoints)
+    path.write_text(text_log(gen_blocks(seed=2)), encoding="utf-8")
+    assert report(scan([path], checkpoints=checkpoints)) == report(scan([path]))
+
+
+def test_window_seek_matches_full_read(tmp_path, monkeypatch):
+    blocks = gen_blocks()
+    path = write_log(tmp_path, blocks)
+    since = datetime(2026, 5, 1, tzinfo=TZ).timestamp()
+    full = report(scan([path], since), since)
+    monkeypatch.setattr(alert_engine, "_ALERT_SEEK_MIN_BYTES", 0)
+    assert report(scan([path], since), since) == full
+    assert full and all(first >= "2026-05-01" for first, _, _, _ in full.values())
+
+
+def test_rotated_logs_merge_like_one_file(tmp_path):
+    blocks = gen_blocks()
+    whole = write_log(tmp_path, blocks)
+    old = write_log(tmp_path, blocks[:700], "alert_DB1.log.1")
+    new = write_log(tmp_path, blocks[700:], "alert_DB1.log.0")
+    assert report(scan([new, old])) == report(scan([whole]))
+
+
+def test_topk_stays_bounded():
+    top = alert_engine.TopK(k=5)
+    rnd = random.Random(3)
+    for i in range(2000):
+        top.add("common" if i % 3 == 0 else f"rare{rnd.randint(1, 500)}")
+    assert len(top.items) == 5
+    item, count, error = top.top(1)[0]
+    assert item == "common" and count - error <= 667 <= count
+
+
+def test_daily_buckets_window_matches_summarize(tmp_path):
+    path = write_log(tmp_path, gen_blocks())
+    runs = scan([path])
+    buckets = alert_engine.aggregate(runs, alert_engine.Kinds(["ORA"], alert_engine.DailyBuckets()))
+    day = datetime(2026, 4, 10).date().toordinal() - datetime(1970, 1, 1).date().toordinal()
+    since = datetime(2026, 4, 10, tzinfo=TZ).timestamp()
+    got = {code: (m["first"], m["last"], m["info"], m["count"]) for code, m in buckets.window(day, 10 ** 9).items()}
+    assert got == report(runs, since)
+
+
+def test_xml_candidates_match_db_names_exactly(tmp_path):
+    def adr_xml(path, db, inst):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"<msg time='2026-01-01T00:00:00.000+07:00' adr_home='/u01/app/oracle/diag/rdbms/{db}/{inst}'>"
+                        "\n <txt>Starting ORACLE instance\n </txt>\n</msg>\n", encoding="utf-8")
+        return path
+    cdb10 = adr_xml(tmp_path / "log.xml", "cdb10", "cdb101")
+    cdb1 = adr_xml(tmp_path / "alert" / "log.xml", "cdb1", "cdb11")
+    assert alert_engine.xml_candidates(tmp_path, "CDB1") == [cdb1]
+    assert alert_engine.xml_candidates(tmp_path, "CDB10") == [cdb10]
+    assert alert_engine.xml_candidates(tmp_path, None, ["cdb11"]) == [cdb1]
+    assert alert_engine.xml_candidates(tmp_path, "CDB2") == []
+
+
+def test_case_insensitive_pattern_triggers_in_any_case(tmp_path):
+    lines = ["Global Enqueue Services Deadlock detected", "DeadLock detected while waiting", "DEADLOCK DETECTED",
+             "deadlock detected", "no dead lock here"]
+    blocks = [("2026-01-01T00:00:0%d.000000+07:00" % i, [line]) for i, line in enumerate(lines)]
+    path = write_log(tmp_path, blocks)
+    assert sum(r[2] for r in scan([path]).runs["Deadlock"]) == 4
+    runs = alert_engine.scan_alert_lines(text_log(blocks).splitlines(), local_tz=TZ)
+    assert sum(r[2] for r in runs.runs["Deadlock"]) == 4
+
+
+def template_counts(runs):
+    return {code: {t: c for t, c, e in sketch.top()} for code, sketch in runs.templates.items()}
+
+
+def test_templates_counted_while_scanning(tmp_path, monkeypatch):
+    path = write_log(tmp_path, gen_blocks())
+    since = datetime(2026, 3, 1, tzinfo=TZ).timestamp()
+    runs = scan([path], since)
+    expected = {}
+    for code, meta in alert_engine.summarize(runs, since).items():
+        assert sum(template_counts(runs)[code].values()) == meta["count"]
+    for ts, msgs in gen_blocks():
+        if datetime.fromisoformat(ts).timestamp() < since:
+            continue
+        for m in msgs:
+            code, _, info = m.partition(":")
+            if code.startswith("ORA-"):
+                counts = expected.setdefault(code, {})
+                template = alert_engine.message_template(code, info.strip())
+                counts[template] = counts.get(template, 0) + 1
+    assert {c: t for c, t in template_counts(runs).items() if c.startswith("ORA-")} == expected
+    # runs keep one variant per template, not one message per occurrence
+    assert all(len(runs.variants[c]) == len(expected[c]) for c in expected)
+
+    monkeypatch.setattr(alert_engine, "_ALERT_PARALLEL_MIN_BYTES", 0)
+    assert template_counts(scan([path], since, workers=3)) == template_counts(runs)
+
+
+def test_checkpointed_templates_follow_the_window(tmp_path):
+    path = write_log(tmp_path, gen_blocks())
+    checkpoints = alert_checkpoint.AlertCheckpoints(tmp_path / "ck")
+    since = datetime(2026, 3, 1, tzinfo=TZ).timestamp()
+    scan([path], since, checkpoints=checkpoints)
+    later = since + 6 * 3600
+    resumed = scan([path], later, checkpoints=checkpoints)
+    fresh = scan([path], later)
+    assert template_counts(resumed) == template_counts(fresh)
+    assert report(resumed, later) == report(fresh, later)
+
+
+def test_checkpoint_resume_reports_the_windows_own_first_message(tmp_path):
+    now = datetime.now(TZ).replace(microsecond=0)
+    t0 = now - timedelta(days=10)
+    blocks = [(t0.isoformat(timespec="microseconds"), ["ORA-01555: snapshot too old: rollback segment number 1"]),
+              ((t0 + timedelta(minutes=20)).isoformat(timespec="microseconds"),
+               ["ORA-01555: snapshot too old: rollback segment number 2"]),
+              ((t0 + timedelta(minutes=40)).isoformat(timespec="microseconds"),
+               ["ORA-01555: snapshot too old: rollback segment number 3"])]
+    for name, write in (("alert_DB1.log", text_log), ("log.xml", xml_log)):
+        path = tmp_path / name
+        path.write_text(write(blocks), encoding="utf-8")
+        checkpoints = alert_checkpoint.AlertCheckpoints(tmp_path / ("ck_" + name))
+        first_since = (t0 - timedelta(minutes=5)).timestamp()
+        assert report(scan([path], first_since, checkpoints=checkpoints), first_since)["ORA-01555"][2].endswith("number 1")
+        later = (t0 + timedelta(minutes=10)).timestamp()  # the number 1 occurrence drops out of the window
+        resumed = report(scan([path], later, checkpoints=checkpoints), later)
+        assert resumed == report(scan([path], later), later)
+        assert resumed["ORA-01555"][2].endswith("number 2") and resumed["ORA-01555"][3] == 2
@@ -0,0 +1,31 @@
+"""
+mini_pm helpers: DB folder name pairing across node/old inputs, and which alert logs a DB folder uses.
+"""
+from datetime import datetime, timedelta, timezone
+
+import mini_pm
+
+
+def test_node_suffixes_are_stripped():
+    for name in ("CDB-1", "cdb_2", "CDB_node3", "CDBNODE4", "CDB-05", "CDB1", "CDB2", "CDB02"):
+        assert mini_pm._normalize_db_name(name) == "CDB", name
+
+
+def test_db_names_ending_in_digits_stay_apart(tmp_path):
+    for name in ("CDB3", "CDB4", "ORCL19"):
+        (tmp_path / name / "log").mkdir(parents=True)
+    keys = {mini_pm._normalize_db_name(p.name): p.name for p in mini_pm.list_database_dirs(tmp_path)}
+    assert keys == {"CDB3": "CDB3", "CDB4": "CDB4", "ORCL19": "ORCL19"}
+
+
+def test_db_alerts_use_only_the_log_xml_of_their_own_db(tmp_path):
+    def adr_xml(path, db, inst, line):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"<msg time='2026-01-01T00:00:00.000+07:00' adr_home='/u01/app/oracle/diag/rdbms/{db}/{inst}'>"
+                        f"\n <txt>{line}\n </txt>\n</msg>\n", encoding="utf-8")
+    log_dir = tmp_path / "CDB1" / "log"
+    adr_xml(log_dir / "log.xml", "cdb10", "cdb101", "ORA-00600: internal error code, arguments: [1]")
+    adr_xml(log_dir / "alert" / "log.xml", "cdb1", "cdb11", "ORA-01555: snapshot too old")
+    tz = timezone(timedelta(hours=7))
+    runs, notes, msg = mini_pm._scan_db_alerts(tmp_path / "CDB1", datetime(2025, 1, 1, tzinfo=tz).timestamp(), tz)
+    assert msg == "" and set(runs.runs) == {"ORA-01555"}, notes